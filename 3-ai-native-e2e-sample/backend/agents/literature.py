@@ -1,28 +1,32 @@
-from azure.ai.projects.models import AgentEventHandler, MessageDeltaChunk, ThreadMessage, ThreadRun, RunStep, RunStatus, RunStepType, RunStepStatus
+from azure.ai.projects.models import AsyncAgentEventHandler, MessageDeltaChunk, ThreadMessage, ThreadRun, RunStep, RunStatus, RunStepType, RunStepStatus
 from typing import Any, Generator, Dict, Union
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
-class LiteratureChatHandler(AgentEventHandler):
-    """Event handler for streaming literature chat responses."""
+class LiteratureChatHandler(AsyncAgentEventHandler):
+    """Async event handler for streaming literature chat responses.
+
+    Hooks return structured event dicts; they are encoded as SSE frames only
+    when written to the response (see utils.streaming.encode_stream).
+    """
     
     def __init__(self):
         super().__init__()
         self.current_run_status = None
+        self.run = None
         
-    def on_message_delta(self, delta: MessageDeltaChunk) -> Generator[Union[str, Dict[str, Any]], None, None]:
+    async def on_message_delta(self, delta: MessageDeltaChunk) -> Generator[Union[str, Dict[str, Any]], None, None]:
         """Handle streaming message chunks."""
         if delta.text:
             logger.debug(f"Received message delta: {delta.text[:100]}...")
-            return json.dumps({
+            return {
                 "type": "delta",
                 "content": delta.text
-            })
+            }
         return None
 
-    def on_thread_message(self, message: ThreadMessage) -> Generator[Dict[str, Any], None, None]:
+    async def on_thread_message(self, message: ThreadMessage) -> Generator[Dict[str, Any], None, None]:
         """Handle complete thread messages."""
         if message.content and len(message.content) > 0:
             logger.info(f"Received thread message: {message.id}")
@@ -34,20 +38,21 @@ class LiteratureChatHandler(AgentEventHandler):
                     content = str(message.content)
 
                 if content.strip():  # Only send if there's actual content
-                    return json.dumps({
+                    return {
                         "type": "message",
                         "content": content
-                    })
+                    }
             except Exception as e:
                 logger.error(f"Error processing message content: {str(e)}")
-                return json.dumps({"error": str(e)})
+                return {"error": str(e)}
         return None
 
-    def on_thread_run(self, run: ThreadRun) -> None:
+    async def on_thread_run(self, run: ThreadRun) -> None:
         """Handle thread run status updates."""
+        self.run = run
         logger.info(f"Thread run status: {run.status}")
 
-    def on_run_step(self, step: RunStep) -> None:
+    async def on_run_step(self, step: RunStep) -> None:
         """Handle individual run steps."""
         logger.info(f"Run step type: {step.type}, Status: {step.status}")
 
@@ -58,32 +63,32 @@ class LiteratureChatHandler(AgentEventHandler):
         logger.info(f"Thread run status: {status}")
         
         if status == RunStatus.FAILED:
-            return json.dumps({
+            return {
                 "type": "error",
                 "content": "The assistant encountered an error processing your request."
-            })
+            }
         return None
 
-    def on_error(self, data: str) -> Generator[Dict[str, Any], None, None]:
+    async def on_error(self, data: str) -> Generator[Dict[str, Any], None, None]:
         """Handle error events."""
         error_msg = f"Error in literature chat: {data}"
         logger.error(error_msg)
-        return json.dumps({
+        return {
             "type": "error",
             "content": error_msg
-        })
+        }
 
-    def on_done(self) -> Generator[Dict[str, Any], None, None]:
+    async def on_done(self) -> Generator[Dict[str, Any], None, None]:
         """Handle stream completion."""
         logger.info("Literature chat stream completed")
         if self.current_run_status == RunStatus.FAILED:
-            return json.dumps({
+            return {
                 "type": "error",
                 "content": "The conversation ended with an error."
-            })
-        return json.dumps({"done": True})
+            }
+        return {"done": True}
 
-    def on_unhandled_event(self, event_type: str, event_data: Any) -> None:
+    async def on_unhandled_event(self, event_type: str, event_data: Any) -> None:
         """Handle any unrecognized events."""
         logger.warning(f"Unhandled event type: {event_type}, Data: {event_data}")
 
@@ -118,25 +123,25 @@ class LiteratureChatHandler(AgentEventHandler):
                             content = str(message.content)
                             
                         # Return properly formatted JSON response
-                        return None, None, json.dumps({
+                        return None, None, {
                             "type": "message",
                             "content": content
-                        })
+                        }
                     except Exception as e:
                         logger.error(f"Error processing message content: {str(e)}")
-                        return None, None, json.dumps({
+                        return None, None, {
                             "type": "error",
                             "content": f"Failed to process message: {str(e)}"
-                        })
+                        }
 
             if run_status == RunStatus.COMPLETED:
                 logger.info("Literature chat stream completed")
                 
         except Exception as e:
             logger.error(f"Error in literature chat handler: {str(e)}")
-            return None, None, json.dumps({
+            return None, None, {
                 "type": "error",
                 "content": f"Handler error: {str(e)}"
-            })
+            }
         
         return None, None, None
@@ -0,0 +1,226 @@
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.projects.models import (
+    AsyncAgentEventHandler, FunctionTool, MessageDeltaChunk, RequiredFunctionToolCall, RunStatus,
+    SubmitToolOutputsAction, ThreadMessage, ThreadRun, ToolOutput
+)
+from opentelemetry import trace
+from agents.reaper import ACTIVE_RUN_STATUSES
+from utils.resilience import RetryPolicy, call_with_retry, get_breaker
+from utils.streaming import JSONFieldStream
+from utils.telemetry import latency_recorder, tracer
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Function tools are synchronous; they run on a dedicated, bounded executor so
+# that slow tools neither block the event loop nor starve other streams
+TOOL_EXECUTOR_MAX_WORKERS = int(os.getenv("TOOL_EXECUTOR_MAX_WORKERS", "8"))
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "30"))
+
+_tool_executor: Optional[ThreadPoolExecutor] = None
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Return the executor shared by all function tool calls."""
+    global _tool_executor
+    if _tool_executor is None:
+        _tool_executor = ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_MAX_WORKERS, thread_name_prefix="tool-call")
+    return _tool_executor
+
+async def _execute_tool_call(functions: FunctionTool, tool_call: RequiredFunctionToolCall, timeout: float) -> tuple[ToolOutput, Dict[str, Any]]:
+    """Execute one function call under its own span and timeout.
+
+    A failing or timed-out call produces an error output, so that the run can
+    still continue with the outputs of the other calls.
+    """
+    name = tool_call.function.name
+    with tracer.start_as_current_span(f"tool_call.{name}") as span:
+        span.set_attribute("tool.name", name)
+        started_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            output = await asyncio.wait_for(
+                loop.run_in_executor(get_tool_executor(), functions.execute, tool_call),
+                timeout=timeout
+            )
+            event = {'type': 'message', 'content': f'Executed function call: {name}'}
+        except asyncio.TimeoutError:
+            logger.error(f"Tool call {name} timed out after {timeout}s")
+            span.set_status(trace.Status(trace.StatusCode.ERROR, "timeout"))
+            output = json.dumps({"error": f"{name} timed out"})
+            event = {'type': 'message', 'content': f'Function call timed out: {name}'}
+        except Exception as e:
+            logger.error(f"Error executing tool call: {e}")
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+            span.record_exception(e)
+            output = json.dumps({"error": str(e)})
+            event = {'type': 'message', 'content': f'Function call failed: {name}'}
+        finally:
+            elapsed = time.perf_counter() - started_at
+            span.set_attribute("tool.latency_ms", round(elapsed * 1000, 1))
+            latency_recorder.record(f"tool.{name}", elapsed)
+        return ToolOutput(tool_call_id=tool_call.id, output=output), event
+
+async def execute_tool_calls(
+    functions: FunctionTool,
+    run: ThreadRun,
+    timeout: float = TOOL_CALL_TIMEOUT
+) -> tuple[List[ToolOutput], List[Dict[str, Any]]]:
+    """Execute the function calls required by a run concurrently.
+
+    Returns:
+        The tool outputs to submit together (in request order) and the status
+        events describing each call.
+    """
+    tool_calls = run.required_action.submit_tool_outputs.tool_calls
+    if not tool_calls:
+        logger.error("No tool calls provided")
+        return [], []
+    results = await asyncio.gather(*(
+        _execute_tool_call(functions, tool_call, timeout)
+        for tool_call in tool_calls
+        if isinstance(tool_call, RequiredFunctionToolCall)
+    ))
+    return [output for output, _ in results], [event for _, event in results]
+
+def message_text(message: Optional[ThreadMessage]) -> Optional[str]:
+    """Return the concatenated text parts of an assistant message, if any."""
+    if message is None or message.role != "assistant":
+        return None
+    text = "".join(part.text.value for part in message.text_messages if part.text)
+    return text or None
+
+def requires_tool_outputs(run: ThreadRun) -> bool:
+    """Check whether a run is waiting for function call results."""
+    return (
+        run.status == RunStatus.REQUIRES_ACTION
+        and isinstance(getattr(run, "required_action", None), SubmitToolOutputsAction)
+    )
+
+class MedicationAnalysisHandler(AsyncAgentEventHandler):
+    """Async event handler driving a medication analysis run over the streaming API.
+
+    Run status changes are surfaced as SSE status events, and required function
+    calls are executed and submitted back onto the same stream. The assistant's
+    JSON answer is parsed while it streams: each top-level field is emitted as a
+    {'type': 'field', 'field': ..., 'content': ...} event as soon as it is complete.
+    """
+
+    def __init__(self, project_client: AIProjectClient, functions: FunctionTool):
+        super().__init__()
+        self.project_client = project_client
+        self.functions = functions
+        self.run: Optional[ThreadRun] = None
+        self.first_status_at: Optional[float] = None
+        self.emitted_fields: Dict[str, Any] = {}
+        # Last assistant message completed on the stream, i.e. the run's answer
+        self.completed_message: Optional[ThreadMessage] = None
+        self._message_id: Optional[str] = None
+        self._fields = JSONFieldStream()
+
+    async def on_message_delta(self, delta: MessageDeltaChunk) -> Optional[List[Dict[str, Any]]]:
+        """Parse streamed answer text, emitting top-level fields as they complete."""
+        if not delta.text:
+            return None
+        if delta.id != self._message_id:
+            # Every assistant message is parsed on its own
+            self._message_id = delta.id
+            self._fields = JSONFieldStream()
+        events = []
+        for field, value in self._fields.feed(delta.text):
+            self.emitted_fields[field] = value
+            events.append({'type': 'field', 'field': field, 'content': value})
+        return events
+
+    async def on_thread_run(self, run: ThreadRun) -> Optional[List[Dict[str, Any]]]:
+        """Handle thread run status updates, submitting tool outputs when required."""
+        if self.first_status_at is None:
+            self.first_status_at = time.perf_counter()
+        self.run = run
+        logger.info(f"Current run status: {run.status}")
+        events = [{'type': 'message', 'content': f'Run status: {run.status}'}]
+
+        if requires_tool_outputs(run):
+            tool_outputs, tool_events = await execute_tool_calls(self.functions, run)
+            events.extend(tool_events)
+            if tool_outputs:
+                await self.project_client.agents.submit_tool_outputs_to_stream(
+                    thread_id=run.thread_id,
+                    run_id=run.id,
+                    tool_outputs=tool_outputs,
+                    event_handler=self
+                )
+        return events
+
+    async def on_thread_message(self, message: ThreadMessage) -> None:
+        """Keep the latest completed assistant message so it need not be fetched again."""
+        if message.status == "completed" and message.role == "assistant":
+            self.completed_message = message
+
+    async def on_error(self, data: str) -> List[Dict[str, Any]]:
+        """Handle error events."""
+        logger.error(f"Error in medication analysis stream: {data}")
+        return [{'type': 'error', 'content': f'Stream error: {data}'}]
+
+    async def on_unhandled_event(self, event_type: str, event_data: Any) -> None:
+        """Handle any unrecognized events."""
+        logger.debug(f"Unhandled event type: {event_type}")
+
+async def poll_run(
+    project_client: AIProjectClient,
+    run: ThreadRun,
+    functions: FunctionTool,
+    timeout: float = 60.0,
+    initial_delay: float = 0.25,
+    max_delay: float = 2.0,
+    backoff: float = 1.5
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Poll a run to completion with adaptive backoff.
+
+    Polls quickly right after the run starts (when most short runs finish) and
+    progressively slower afterwards, resetting to the fast interval whenever the
+    run makes progress by submitting tool outputs.
+
+    Yields:
+        Status events; the final ThreadRun is yielded as {'type': 'run', 'run': run}.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    thread_id, run_id = run.thread_id, run.id
+    while run.status in ACTIVE_RUN_STATUSES:
+        if time.monotonic() >= deadline:
+            yield {'type': 'error', 'content': 'Run timed out.'}
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * backoff, max_delay)
+        previous_status = run.status
+        # Transient failures are retried within the remaining run time
+        run = await call_with_retry(
+            lambda: project_client.agents.get_run(thread_id=thread_id, run_id=run_id),
+            RetryPolicy.from_env(deadline=max(deadline - time.monotonic(), 0.1)),
+            get_breaker("agents"),
+            name="get_run"
+        )
+        logger.info(f"Current run status: {run.status}")
+        yield {'type': 'message', 'content': f'Run status: {run.status}'}
+        if run.status != previous_status:
+            delay = initial_delay
+        # Handle required function calls if any
+        if requires_tool_outputs(run):
+            tool_outputs, tool_events = await execute_tool_calls(functions, run)
+            for event in tool_events:
+                yield event
+            if not tool_outputs:
+                break
+            run = await project_client.agents.submit_tool_outputs_to_run(
+                thread_id=run.thread_id,
+                run_id=run.id,
+                tool_outputs=tool_outputs
+            )
+            delay = initial_delay
+    yield {'type': 'run', 'run': run}
@@ -0,0 +1,218 @@
+"""
+Deployment Rate Limiter
+
+The literature chat, medication analysis and trial agents all draw on the same
+model deployment quota. This limiter budgets requests per minute (RPM) and
+estimated tokens per minute (TPM) per deployment with token buckets, so that
+agent runs are paced below the quota instead of triggering 429 storms.
+
+Callers declare a priority. Interactive (SSE) requests may use the whole
+budget and are served first; background work such as the trial event consumer
+waits while interactive requests are queued and only uses capacity above a
+reserved fraction, soaking up what is left over.
+
+Token usage is estimated before a run and corrected with the run's reported
+usage once it completes. Limits are configured with MODEL_RPM_LIMIT and
+MODEL_TPM_LIMIT (0 = unlimited), or per deployment with MODEL_RATE_LIMITS, e.g.
+    MODEL_RATE_LIMITS='{"gpt-4o": {"rpm": 300, "tpm": 50000}}'
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from enum import IntEnum
+from typing import Any, Dict, Optional
+from utils.telemetry import latency_recorder
+
+logger = logging.getLogger(__name__)
+
+# Completion tokens assumed for a run until its actual usage is known
+ESTIMATED_COMPLETION_TOKENS = int(os.getenv("MODEL_ESTIMATED_COMPLETION_TOKENS", "800"))
+
+class Priority(IntEnum):
+    """Request priority classes; lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+def estimate_tokens(text: str, completion_tokens: int = ESTIMATED_COMPLETION_TOKENS) -> int:
+    """Rough token estimate for a prompt (about four characters per token) plus its completion."""
+    return len(text) // 4 + completion_tokens
+
+class TokenBucket:
+    """Token bucket refilled continuously at per_minute / 60 per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until amount can be taken while leaving reserve (a fraction of capacity)."""
+        if self.unlimited:
+            return 0.0
+        # A request larger than the share of the bucket it may use would never fit;
+        # let it drain that whole share instead
+        usable = self.capacity * (1.0 - min(max(reserve, 0.0), 1.0))
+        needed = min(amount, usable) + self.capacity - usable - self.level
+        return max(needed, 0.0) / self.rate
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + amount)
+
+class Reservation:
+    """Capacity taken for one run; settle() corrects the token estimate afterwards."""
+
+    def __init__(self, tokens: TokenBucket, estimated_tokens: int):
+        self._tokens = tokens
+        self.estimated_tokens = estimated_tokens
+        self._settled = False
+
+    def settle(self, run: Any) -> None:
+        """Replace the estimate with the run's reported token usage, if any.
+
+        Settling with no run (it was never created) returns the whole estimate.
+        """
+        if run is None:
+            if not self._settled:
+                self._settled = True
+                self._tokens.give_back(self.estimated_tokens)
+            return
+        usage = getattr(run, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if self._settled or total_tokens is None:
+            return
+        self._settled = True
+        # Returns over-estimated tokens to the bucket, or takes the shortfall
+        self._tokens.give_back(self.estimated_tokens - total_tokens)
+
+class _DeploymentBudget:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiting = {priority: 0 for priority in Priority}
+        self.granted = {priority: 0 for priority in Priority}
+        self.throttled = {priority: 0 for priority in Priority}
+
+class DeploymentRateLimiter:
+    """RPM/TPM token buckets per model deployment with priority classes."""
+
+    def __init__(
+        self,
+        default_rpm: float = 0,
+        default_tpm: float = 0,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        background_reserve: float = 0.2
+    ):
+        """
+        Args:
+            default_rpm: Requests per minute for deployments without explicit limits (0 = unlimited).
+            default_tpm: Tokens per minute for deployments without explicit limits (0 = unlimited).
+            limits: Per-deployment {"rpm": ..., "tpm": ...} overrides.
+            background_reserve: Fraction of each bucket background requests may not use,
+                keeping headroom for interactive requests.
+        """
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.limits = limits or {}
+        self.background_reserve = background_reserve
+        self._budgets: Dict[str, _DeploymentBudget] = {}
+
+    @classmethod
+    def from_env(cls) -> "DeploymentRateLimiter":
+        """Create a limiter from MODEL_RPM_LIMIT, MODEL_TPM_LIMIT and MODEL_RATE_LIMITS."""
+        limits = None
+        if raw := os.getenv("MODEL_RATE_LIMITS"):
+            try:
+                limits = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logger.error("Invalid MODEL_RATE_LIMITS, using defaults: %s", str(e))
+        return cls(
+            default_rpm=float(os.getenv("MODEL_RPM_LIMIT", "0")),
+            default_tpm=float(os.getenv("MODEL_TPM_LIMIT", "0")),
+            limits=limits,
+            background_reserve=float(os.getenv("MODEL_BACKGROUND_RESERVE", "0.2"))
+        )
+
+    async def acquire(
+        self,
+        deployment: str,
+        estimated_tokens: int,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Reservation:
+        """Wait until the deployment's budget allows one more run of estimated_tokens."""
+        budget = self._budget(deployment)
+        reserve = self.background_reserve if priority > Priority.INTERACTIVE else 0.0
+        started_at = time.monotonic()
+        throttled = False
+        budget.waiting[priority] += 1
+        try:
+            while True:
+                budget.requests.refill()
+                budget.tokens.refill()
+                # Lower priorities wait while any higher priority request is queued
+                preempted = any(budget.waiting[other] for other in Priority if other < priority)
+                wait = max(
+                    budget.requests.wait_time(1, reserve),
+                    budget.tokens.wait_time(estimated_tokens, reserve)
+                )
+                if not preempted and wait == 0:
+                    break
+                throttled = True
+                await asyncio.sleep(min(max(wait, 0.05), 1.0))
+        finally:
+            budget.waiting[priority] -= 1
+        if throttled:
+            budget.throttled[priority] += 1
+            latency_recorder.record(f"rate_limit.{priority.name.lower()}.wait", time.monotonic() - started_at)
+        budget.requests.take(1)
+        budget.tokens.take(estimated_tokens)
+        budget.granted[priority] += 1
+        return Reservation(budget.tokens, estimated_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            deployment: {
+                "requests_available": None if budget.requests.unlimited else round(budget.requests.level, 1),
+                "tokens_available": None if budget.tokens.unlimited else round(budget.tokens.level),
+                "waiting": {p.name.lower(): count for p, count in budget.waiting.items()},
+                "granted": {p.name.lower(): count for p, count in budget.granted.items()},
+                "throttled": {p.name.lower(): count for p, count in budget.throttled.items()},
+            }
+            for deployment, budget in self._budgets.items()
+        }
+
+    def _budget(self, deployment: str) -> _DeploymentBudget:
+        budget = self._budgets.get(deployment)
+        if budget is None:
+            limits = self.limits.get(deployment, {})
+            budget = _DeploymentBudget(
+                rpm=float(limits.get("rpm", self.default_rpm)),
+                tpm=float(limits.get("tpm", self.default_tpm))
+            )
+            self._budgets[deployment] = budget
+        return budget
+
+rate_limiter = DeploymentRateLimiter.from_env()
+
+def get_rate_limiter() -> DeploymentRateLimiter:
+    """Return the process-wide deployment rate limiter."""
+    return rate_limiter
+
+__all__ = ['DeploymentRateLimiter', 'Priority', 'Reservation', 'estimate_tokens', 'rate_limiter', 'get_rate_limiter']
@@ -0,0 +1,225 @@
+"""
+Agent Resource Reaper
+
+Tracks the threads (and their runs) created by this service and deletes them
+once they are older than a configurable TTL, so that abandoned requests (client
+disconnects, timed out runs) do not leave resources behind in the project.
+Agents whose definition this process superseded are deleted as well, but only
+once they have been retired for a full TTL so that runs still in flight on them
+can finish. Agents are never deleted by name alone, since another deployment
+sharing the project may still be using them. Deletions run in a background task
+with bounded concurrency and a rate limit so that cleanup never competes with
+user traffic for quota.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+from azure.ai.projects.aio import AIProjectClient
+from azure.core.exceptions import ResourceNotFoundError
+from agents.registry import AgentRegistry, agent_registry
+
+logger = logging.getLogger(__name__)
+
+# Run states in which the run is still making progress (and consuming quota)
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "requires_action")
+
+class _TrackedThread:
+    """A thread created by this service and the last run started on it."""
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.run_id: Optional[str] = None
+        self.created_at = time.time()
+
+class ResourceReaper:
+    """Background cleanup of agent threads, runs and superseded agents."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 900.0,
+        interval_seconds: float = 60.0,
+        max_concurrency: int = 4,
+        max_deletes_per_second: float = 5.0,
+        registry: Optional[AgentRegistry] = None
+    ):
+        """
+        Args:
+            ttl_seconds: Age after which a tracked resource is deleted.
+            interval_seconds: Time between cleanup passes.
+            max_concurrency: Maximum number of delete calls in flight.
+            max_deletes_per_second: Upper bound on the delete call rate.
+            registry: Agent registry whose retired agents are deleted once
+                they have been superseded for ttl_seconds.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.max_concurrency = max_concurrency
+        self.min_delete_interval = 1.0 / max_deletes_per_second if max_deletes_per_second > 0 else 0.0
+        self.registry = registry
+        self._threads: Dict[str, _TrackedThread] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._next_delete_at = 0.0
+        self._counts = {
+            "threads_reaped": 0,
+            "agents_reaped": 0,
+            "runs_cancelled": 0,
+            "delete_failures": 0,
+        }
+
+    def track_thread(self, thread_id: str) -> None:
+        """Register a thread created by this service."""
+        self._threads.setdefault(thread_id, _TrackedThread(thread_id))
+
+    def track_run(self, thread_id: str, run_id: str) -> None:
+        """Record the run started on a tracked thread so it can be cancelled before deletion."""
+        self._threads.setdefault(thread_id, _TrackedThread(thread_id)).run_id = run_id
+
+    def cancel_run(self, project_client: AIProjectClient, thread_id: str, run_id: str) -> None:
+        """Cancel an abandoned run in the background.
+
+        Used when an SSE client disconnects or a request times out; the cancel
+        call is scheduled as its own task so it completes even though the
+        request that started the run is being torn down.
+        """
+        task = asyncio.create_task(self._cancel_run(project_client, thread_id, run_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counts of live (tracked) and reaped resources."""
+        retired = len(self.registry.retired_agents()) if self.registry else 0
+        return {"threads_live": len(self._threads), "agents_retired": retired, **self._counts}
+
+    def start(self, client_factory: Callable[[], Awaitable[AIProjectClient]]) -> None:
+        """Start the background cleanup loop.
+
+        Args:
+            client_factory: Coroutine function returning the shared project client.
+        """
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(client_factory))
+        logger.info("🧹 Resource reaper started (ttl=%ss, interval=%ss)", self.ttl_seconds, self.interval_seconds)
+
+    async def stop(self) -> None:
+        """Stop the background cleanup loop."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("🛑 Resource reaper stopped")
+
+    async def _run(self, client_factory: Callable[[], Awaitable[AIProjectClient]]) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                project_client = await client_factory()
+                await self.reap(project_client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Resource reaper pass failed: %s", str(e), exc_info=True)
+
+    async def reap(self, project_client: AIProjectClient) -> None:
+        """Run a single cleanup pass over expired threads and superseded agents."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [tracked for tracked in self._threads.values() if tracked.created_at <= cutoff]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def reap_thread(tracked: _TrackedThread) -> None:
+            async with semaphore:
+                if tracked.run_id:
+                    await self._throttle()
+                    await self._cancel_run(project_client, tracked.thread_id, tracked.run_id)
+                deleted = await self._delete(project_client.agents.delete_thread, tracked.thread_id)
+                if deleted:
+                    self._counts["threads_reaped"] += 1
+                if deleted is not None:
+                    # Failed deletions stay tracked and are retried on the next pass
+                    self._threads.pop(tracked.thread_id, None)
+
+        if expired:
+            await asyncio.gather(*(reap_thread(tracked) for tracked in expired))
+            logger.info("🧹 Reaped %d expired threads", len(expired))
+
+        if self.registry:
+            await self._sweep_agents(project_client, semaphore, cutoff)
+
+    async def _sweep_agents(self, project_client: AIProjectClient, semaphore: asyncio.Semaphore, cutoff: float) -> None:
+        """Delete agents retired by this process once they have been superseded for a full TTL.
+
+        Only agent IDs recorded by the registry are considered, so agents of other
+        deployments or versions sharing the project are never touched. Any thread
+        (and run) that could still reference a retired agent has expired by then.
+        """
+        stale_ids = [
+            agent_id for agent_id, retired_at in self.registry.retired_agents().items()
+            if retired_at <= cutoff
+        ]
+
+        async def reap_agent(agent_id: str) -> None:
+            async with semaphore:
+                deleted = await self._delete(project_client.agents.delete_agent, agent_id)
+                if deleted:
+                    self._counts["agents_reaped"] += 1
+                if deleted is not None:
+                    self.registry.forget_retired(agent_id)
+
+        if stale_ids:
+            await asyncio.gather(*(reap_agent(agent_id) for agent_id in stale_ids))
+            logger.info("🧹 Reaped %d superseded agents", len(stale_ids))
+
+    async def _cancel_run(self, project_client: AIProjectClient, thread_id: str, run_id: str) -> None:
+        try:
+            await project_client.agents.cancel_run(thread_id=thread_id, run_id=run_id)
+            self._counts["runs_cancelled"] += 1
+            logger.info("🚫 Cancelled run %s", run_id)
+        except Exception as e:
+            # Runs that already finished cannot be cancelled
+            logger.debug("Could not cancel run %s: %s", run_id, str(e))
+
+    async def _delete(self, delete: Callable[[str], Awaitable[object]], resource_id: str) -> Optional[bool]:
+        """Delete a resource, returning True if deleted, False if already gone and None on failure."""
+        await self._throttle()
+        try:
+            await delete(resource_id)
+            return True
+        except ResourceNotFoundError:
+            return False
+        except Exception as e:
+            self._counts["delete_failures"] += 1
+            logger.warning("Failed to delete %s: %s", resource_id, str(e))
+            return None
+
+    async def _throttle(self) -> None:
+        """Space out delete calls to respect the configured rate limit."""
+        if self._rate_lock is None:
+            self._rate_lock = asyncio.Lock()
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_delete_at - now
+            self._next_delete_at = max(now, self._next_delete_at) + self.min_delete_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+resource_reaper = ResourceReaper(
+    ttl_seconds=float(os.getenv("REAPER_TTL_SECONDS", "900")),
+    interval_seconds=float(os.getenv("REAPER_INTERVAL_SECONDS", "60")),
+    max_concurrency=int(os.getenv("REAPER_MAX_CONCURRENCY", "4")),
+    max_deletes_per_second=float(os.getenv("REAPER_MAX_DELETES_PER_SECOND", "5")),
+    registry=agent_registry
+)
+
+def get_resource_reaper() -> ResourceReaper:
+    """FastAPI dependency returning the process-wide resource reaper."""
+    return resource_reaper
+
+__all__ = ['ACTIVE_RUN_STATUSES', 'ResourceReaper', 'resource_reaper', 'get_resource_reaper']
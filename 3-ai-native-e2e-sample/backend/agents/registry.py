@@ -0,0 +1,214 @@
+"""
+Agent Registry
+
+Creates each agent definition once and reuses it across requests instead of
+calling create_agent per request. An agent is identified by its name, model,
+a hash of its instructions and its tool set; the resulting fingerprint is stored
+in the agent's metadata so that existing agents can be found again after a
+restart. Agent IDs are cached in memory and re-validated lazily, and an agent is
+only re-created when its definition changes (or it was deleted remotely).
+Superseded agents are not deleted right away, since in-flight runs may still use
+them; they are handed to the resource reaper, which deletes them after a grace
+period.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.projects.models import Agent
+from azure.core.exceptions import ResourceNotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys written on every agent created through the registry
+FINGERPRINT_KEY = "definition_hash"
+MANAGED_BY_KEY = "managed_by"
+MANAGED_BY_VALUE = "clinical-trials-monitor"
+
+def _as_plain(value: Any) -> Any:
+    """Convert SDK models to plain JSON-serializable structures."""
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    if isinstance(value, (list, tuple)):
+        return [_as_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _as_plain(item) for key, item in value.items()}
+    return value
+
+class AgentDefinition:
+    """Declarative description of an agent managed by the registry."""
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        instructions: str,
+        tools: Optional[List[Any]] = None,
+        tool_resources: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any
+    ):
+        self.name = name
+        self.model = model
+        self.instructions = instructions
+        self.tools = tools or []
+        self.tool_resources = tool_resources
+        self.headers = headers
+        # Additional create_agent options (e.g. temperature, response_format)
+        self.options = kwargs
+
+    def fingerprint(self) -> str:
+        """Return a stable hash of everything that defines the agent's behavior."""
+        payload = {
+            "name": self.name,
+            "model": self.model,
+            "instructions": hashlib.sha256(self.instructions.encode("utf-8")).hexdigest(),
+            "tools": _as_plain(self.tools),
+            "tool_resources": _as_plain(self.tool_resources),
+            "options": _as_plain(self.options),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class _RegistryEntry:
+    """Cached agent together with its fingerprint and last validation time."""
+
+    def __init__(self, agent: Agent, fingerprint: str):
+        self.agent = agent
+        self.fingerprint = fingerprint
+        self.validated_at = time.monotonic()
+
+class AgentRegistry:
+    """Process-wide cache of agents keyed by definition."""
+
+    def __init__(self, revalidate_seconds: float = 300.0, max_lookup_pages: int = 5):
+        """
+        Args:
+            revalidate_seconds: How long a cached agent ID is trusted before it is
+                checked again with get_agent.
+            max_lookup_pages: Maximum number of list_agents pages scanned when
+                looking for an existing agent on a cold cache.
+        """
+        self.revalidate_seconds = revalidate_seconds
+        self.max_lookup_pages = max_lookup_pages
+        self._entries: Dict[str, _RegistryEntry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Superseded agent IDs and when they were retired (wall clock)
+        self._retired: Dict[str, float] = {}
+
+    async def get_agent(self, project_client: AIProjectClient, definition: AgentDefinition) -> Agent:
+        """Return an agent matching the definition, creating it only if needed."""
+        fingerprint = definition.fingerprint()
+        lock = self._locks.setdefault(definition.name, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(definition.name)
+            if entry and entry.fingerprint == fingerprint:
+                if time.monotonic() - entry.validated_at < self.revalidate_seconds:
+                    return entry.agent
+                agent = await self._revalidate(project_client, entry)
+                if agent:
+                    return agent
+            elif entry:
+                logger.info("🔁 Definition of agent '%s' changed, retiring %s", definition.name, entry.agent.id)
+                self._retire(entry.agent)
+
+            self._entries.pop(definition.name, None)
+            agent = await self._find_existing(project_client, definition, fingerprint)
+            if not agent:
+                agent = await self._create(project_client, definition, fingerprint)
+            self._entries[definition.name] = _RegistryEntry(agent, fingerprint)
+            return agent
+
+    def invalidate(self, name: str) -> None:
+        """Drop a cached agent so the next lookup re-validates it remotely."""
+        self._entries.pop(name, None)
+
+    def cached_agents(self) -> Dict[str, str]:
+        """Return the cached agent IDs keyed by agent name."""
+        return {name: entry.agent.id for name, entry in self._entries.items()}
+
+    def retired_agents(self) -> Dict[str, float]:
+        """Return superseded agent IDs awaiting deletion, with their retirement time."""
+        return dict(self._retired)
+
+    def forget_retired(self, agent_id: str) -> None:
+        """Stop tracking a retired agent once it has been deleted."""
+        self._retired.pop(agent_id, None)
+
+    async def _revalidate(self, project_client: AIProjectClient, entry: _RegistryEntry) -> Optional[Agent]:
+        try:
+            agent = await project_client.agents.get_agent(entry.agent.id)
+        except ResourceNotFoundError:
+            logger.warning("Cached agent %s no longer exists", entry.agent.id)
+            return None
+        entry.agent = agent
+        entry.validated_at = time.monotonic()
+        return agent
+
+    async def _find_existing(
+        self,
+        project_client: AIProjectClient,
+        definition: AgentDefinition,
+        fingerprint: str
+    ) -> Optional[Agent]:
+        """Look for an agent previously created from the same definition."""
+        after = None
+        for _ in range(self.max_lookup_pages):
+            page = await project_client.agents.list_agents(limit=100, after=after)
+            for agent in page.data:
+                metadata = agent.metadata or {}
+                if agent.name == definition.name and metadata.get(FINGERPRINT_KEY) == fingerprint:
+                    logger.info("♻️ Reusing existing agent '%s': %s", definition.name, agent.id)
+                    return agent
+            if not page.has_more:
+                break
+            after = page.last_id
+        return None
+
+    async def _create(
+        self,
+        project_client: AIProjectClient,
+        definition: AgentDefinition,
+        fingerprint: str
+    ) -> Agent:
+        options = dict(definition.options)
+        if definition.tools:
+            options["tools"] = definition.tools
+        if definition.tool_resources is not None:
+            options["tool_resources"] = definition.tool_resources
+        if definition.headers:
+            options["headers"] = definition.headers
+        agent = await project_client.agents.create_agent(
+            model=definition.model,
+            name=definition.name,
+            instructions=definition.instructions,
+            metadata={FINGERPRINT_KEY: fingerprint, MANAGED_BY_KEY: MANAGED_BY_VALUE},
+            **options
+        )
+        logger.info("✅ Created agent '%s' with ID: %s", definition.name, agent.id)
+        return agent
+
+    def _retire(self, agent: Agent) -> None:
+        """Mark an agent whose definition has been superseded for deferred deletion.
+
+        Only agents carrying this service's managed_by marker are retired; anything
+        else in the project is left alone.
+        """
+        if (agent.metadata or {}).get(MANAGED_BY_KEY) != MANAGED_BY_VALUE:
+            return
+        self._retired.setdefault(agent.id, time.time())
+
+agent_registry = AgentRegistry(
+    revalidate_seconds=float(os.getenv("AGENT_REGISTRY_REVALIDATE_SECONDS", "300"))
+)
+
+def get_agent_registry() -> AgentRegistry:
+    """FastAPI dependency returning the process-wide agent registry."""
+    return agent_registry
+
+__all__ = ['AgentDefinition', 'AgentRegistry', 'agent_registry', 'get_agent_registry']
@@ -13,13 +13,30 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from azure.eventhub.aio import EventHubConsumerClient
 from opentelemetry import trace
+from utils.resilience import CircuitOpenError
 from utils.telemetry import tracer
 import os
-from .coordinator import TrialAgentCoordinator
+from agents.trials.multi_agent.coordinator import TrialAgentCoordinator
 from config import EVENT_HUBS_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def create_checkpoint_store():
+    """Return a blob checkpoint store if EVENTHUB_CHECKPOINT_STORE_CONNECTION_STRING is set, else None.
+
+    Without a checkpoint store, checkpoints are not persisted and consumption
+    starts at the latest event after every restart.
+    """
+    connection_string = os.getenv("EVENTHUB_CHECKPOINT_STORE_CONNECTION_STRING")
+    if not connection_string:
+        return None
+    # Imported lazily: only needed when checkpoints are persisted
+    from azure.eventhub.extensions.checkpointstoreblobaio import BlobCheckpointStore
+    return BlobCheckpointStore.from_connection_string(
+        connection_string,
+        container_name=os.getenv("EVENTHUB_CHECKPOINT_CONTAINER", "trial-checkpoints")
+    )
+
 class TrialEventsConsumer:
     """Consumes trial events and processes them through the multi-agent system."""
     
@@ -31,10 +48,17 @@ class TrialEventsConsumer:
         integrating telemetry and aggregated analysis.
         """
         self.coordinator = coordinator
+        # Events received per partition and processed together
+        self.max_batch_size = int(os.getenv("TRIAL_CONSUMER_BATCH_SIZE", "32"))
+        # Pauses (while the agents' breaker is open) before an event is skipped
+        self.max_pauses = int(os.getenv("TRIAL_CONSUMER_MAX_PAUSES", "5"))
+        self.stats = {"events_processed": 0, "events_failed": 0}
+        self.checkpoint_store = create_checkpoint_store()
         self.consumer = EventHubConsumerClient.from_connection_string(
             conn_str=EVENT_HUBS_CONFIG["connection_string"],
             consumer_group=EVENT_HUBS_CONFIG["consumer_group"],
-            eventhub_name=EVENT_HUBS_CONFIG["eventhub_name"]
+            eventhub_name=EVENT_HUBS_CONFIG["eventhub_name"],
+            checkpoint_store=self.checkpoint_store
         )
         logger.info("✅ Trial events consumer initialized")
     
@@ -44,6 +68,10 @@ class TrialEventsConsumer:
         
         This method extracts the trial event payload and hands it over to the coordinator
         for detailed analysis, connecting simulation with agent-based interpretation.
+        Agent calls are retried by the agents themselves. While the agents' circuit
+        breaker is open, consumption pauses and the event is tried again, up to
+        max_pauses times; an event that still fails is logged and skipped so the
+        receive loop keeps running.
         """
         with tracer.start_as_current_span("process_trial_event") as span:
             try:
@@ -51,17 +79,41 @@ class TrialEventsConsumer:
                 span.set_attribute("trial.id", trial_id)
                 logger.info("🔄 Processing trial event: %s", trial_id)
                 
-                analysis = await self.coordinator.process_trial_event(event)
+                pauses = 0
+                while True:
+                    try:
+                        analysis = await self.coordinator.process_trial_event(event)
+                        break
+                    except CircuitOpenError as e:
+                        # Pause consumption while the agents are unavailable instead
+                        # of failing (and dropping) every event in the meantime
+                        pauses += 1
+                        if pauses > self.max_pauses:
+                            raise
+                        logger.warning("⏸️ Trial agents unavailable, pausing %.1fs", e.retry_after)
+                        await asyncio.sleep(max(e.retry_after, 1.0))
                 
+                self.stats["events_processed"] += 1
                 logger.info("✅ Analysis completed for trial: %s", trial_id)
                 logger.debug("Analysis results: %s", analysis)
                 span.set_attribute("analysis.completed", True)
                 
             except Exception as e:
+                # A failed event must not stop the receive loop; it is logged and skipped
+                self.stats["events_failed"] += 1
                 logger.error("❌ Error processing trial event: %s", str(e), exc_info=True)
                 span.set_status(trace.Status(trace.StatusCode.ERROR))
                 span.record_exception(e)
-                raise
+    
+    async def process_event_data(self, event_data) -> None:
+        """Parse a received event and process it; a malformed body is logged and skipped."""
+        try:
+            event = json.loads(event_data.body_as_str())
+        except (ValueError, TypeError) as e:
+            self.stats["events_failed"] += 1
+            logger.error("❌ Skipping malformed trial event: %s", str(e))
+            return
+        await self.process_event(event)
     
     async def start_receiving(self) -> None:
         """Start receiving events from Event Hub and processing them."""
@@ -69,15 +121,23 @@ class TrialEventsConsumer:
             try:
                 logger.info("🎯 Starting trial event consumer")
                 async with self.consumer:
-                    async def on_event(partition_context, event):
-                        # Extract event data and forward for processing.
-                        event_data = json.loads(event.body_as_str())
-                        await self.process_event(event_data)
-                        await partition_context.update_checkpoint(event)
+                    async def on_event_batch(partition_context, events):
+                        # Parse and process the batch concurrently, so that the coordinator
+                        # can micro-batch its summary agent calls. Each event is parsed in
+                        # its own task: a malformed body only skips that event.
+                        if not events:
+                            return
+                        await asyncio.gather(*(self.process_event_data(event) for event in events))
+                        if self.checkpoint_store:
+                            await partition_context.update_checkpoint(events[-1])
                     
-                    await self.consumer.receive(
-                        on_event=on_event,
-                        starting_position="-1"  # Start from end
+                    # Partitions without a stored checkpoint start at the end of the
+                    # stream, so a restart never replays the retention window through
+                    # the agents. With a checkpoint store, processing resumes where it stopped.
+                    await self.consumer.receive_batch(
+                        on_event_batch=on_event_batch,
+                        max_batch_size=self.max_batch_size,
+                        starting_position="@latest"
                     )
             except Exception as e:
                 logger.error("❌ Error in event consumer: %s", str(e), exc_info=True)
@@ -85,8 +145,8 @@ class TrialEventsConsumer:
                 span.record_exception(e)
                 raise
 
-    def close(self) -> None:
+    async def close(self) -> None:
         """Close the consumer client."""
         if self.consumer:
             logger.info("🛑 Closing trial event consumer")
-            self.consumer.close()
+            await self.consumer.close()
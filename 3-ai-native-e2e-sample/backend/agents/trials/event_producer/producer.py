@@ -6,14 +6,21 @@ which then triggers multi-agent processing via the event consumer.
 """
 
 import json
+import os
 import random
 import asyncio
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timezone
-from azure.eventhub.aio import EventHubProducerClient
 from azure.eventhub import EventData
+from azure.eventhub.aio import EventHubProducerClient
+from azure.eventhub.exceptions import (
+    AuthenticationError, ClientClosedError, ConnectionLostError, EventDataError, EventHubError
+)
 import logging
+from utils.resilience import RetryPolicy, call_with_retry, get_breaker, is_transient
 from utils.telemetry import tracer
+from .sender import PartitionedSender
+from .synthetic import SyntheticTrialGenerator
 
 from config import EVENT_HUBS_CONFIG
 
@@ -25,6 +32,83 @@ logger.info(f"Event Hub Name: {EVENT_HUBS_CONFIG.get('eventhub_name')}")
 logger.info(f"Consumer Group: {EVENT_HUBS_CONFIG.get('consumer_group')}")
 logger.info(f"Connection String Present: {bool(EVENT_HUBS_CONFIG.get('connection_string'))}")
 
+def is_transient_send_error(error: BaseException) -> bool:
+    """Whether an Event Hubs send failure is worth retrying (not auth or invalid data)."""
+    if isinstance(error, (AuthenticationError, EventDataError)):
+        return False
+    return isinstance(error, EventHubError) or is_transient(error)
+
+# Event Hubs clients retry internally as well, so our layer adds few attempts
+# on top, bounded by an overall deadline, behind the "eventhubs" breaker
+SEND_RETRY_POLICY = RetryPolicy.from_env(
+    max_attempts=2,
+    deadline=float(os.getenv("EVENTHUB_SEND_DEADLINE_SECONDS", "30")),
+    retry_on=is_transient_send_error
+)
+
+# Field whose value keeps related events on one partition, in order
+TRIAL_PARTITION_KEY = os.getenv("TRIAL_PARTITION_KEY", "patientId")
+
+event_sender = PartitionedSender(
+    send=lambda producer, batch: call_with_retry(
+        lambda: producer.send_batch(batch),
+        SEND_RETRY_POLICY,
+        get_breaker("eventhubs"),
+        name="send_batch"
+    )
+)
+
+# Long-lived producer shared by all sends; its AMQP connection and partition links
+# are opened once and reused. Created lazily, closed on application shutdown.
+_producer: Optional[EventHubProducerClient] = None
+_producer_lock: Optional[asyncio.Lock] = None
+
+async def get_producer() -> EventHubProducerClient:
+    """Return the shared Event Hubs producer, creating it on first use."""
+    global _producer, _producer_lock
+    if _producer is not None:
+        return _producer
+    if _producer_lock is None:
+        _producer_lock = asyncio.Lock()
+    async with _producer_lock:
+        if _producer is None:
+            connection_string = EVENT_HUBS_CONFIG.get("connection_string")
+            logger.info("Connection string length: %s", len(connection_string) if connection_string else 0)
+            if not connection_string:
+                raise ValueError("Event Hubs connection string is missing or None")
+            logger.info("About to create EventHubProducerClient with connection string")
+            _producer = EventHubProducerClient.from_connection_string(
+                conn_str=connection_string,
+                eventhub_name=EVENT_HUBS_CONFIG["eventhub_name"]
+            )
+            logger.info("Successfully created EventHubProducerClient")
+    return _producer
+
+async def start_producer() -> None:
+    """Create the shared producer and open its connection ahead of the first send."""
+    producer = await get_producer()
+    properties = await producer.get_eventhub_properties()
+    logger.info("✅ Event Hubs producer connected (%d partitions)", len(properties["partition_ids"]))
+
+async def close_producer() -> None:
+    """Close the shared producer, flushing its links."""
+    global _producer
+    producer, _producer = _producer, None
+    if producer is not None:
+        logger.info("🛑 Closing Event Hubs producer")
+        await producer.close()
+
+async def _discard_producer(producer: EventHubProducerClient) -> None:
+    """Drop a producer whose connection is unusable; the next send reconnects."""
+    global _producer
+    if _producer is producer:
+        _producer = None
+        event_sender.reset()
+    try:
+        await producer.close()
+    except Exception as e:
+        logger.debug("Error closing discarded producer: %s", str(e))
+
 def generate_trial_event() -> Dict[str, Any]:
     """Generate a simulated trial event with random data."""
     return {
@@ -56,33 +140,22 @@ def generate_trial_event() -> Dict[str, Any]:
     }
 
 async def simulate_trial_data(num_events: int = 1) -> list:
-    """Generate and send simulated trial data to Event Hub."""
+    """Generate and send simulated trial data to Event Hub using the shared producer."""
     try:
-        connection_string = EVENT_HUBS_CONFIG.get("connection_string")
-        logger.info("Connection string type: %s", type(connection_string))
-        logger.info("Connection string length: %s", len(connection_string) if connection_string else 0)
-        logger.info("Connection string first 10 chars: %s", connection_string[:10] if connection_string else None)
-        
-        if not EVENT_HUBS_CONFIG.get('connection_string'):
-            raise ValueError("Event Hubs connection string is missing or None")
-            
-        # Create and use EventHubProducerClient to send trial events
-        logger.info("About to create EventHubProducerClient with connection string")
-        producer = EventHubProducerClient.from_connection_string(
-            conn_str=EVENT_HUBS_CONFIG["connection_string"],
-            eventhub_name=EVENT_HUBS_CONFIG["eventhub_name"]
-        )
-        logger.info("Successfully created EventHubProducerClient")
-        
+        producer = await get_producer()
         events = [generate_trial_event() for _ in range(num_events)]
         
-        async with producer:
-            event_data_batch = await producer.create_batch()
-            for event in events:
-                event_data = EventData(json.dumps(event))
-                event_data_batch.add(event_data)
-            await producer.send_batch(event_data_batch)
-            logger.info(f"Successfully sent {len(events)} events to Event Hub")
+        # Events are split into size-limited batches per partition and sent concurrently
+        try:
+            partitions = await event_sender.send(producer, (
+                (str(event.get(TRIAL_PARTITION_KEY)), json.dumps(event)) for event in events
+            ))
+        except (ClientClosedError, ConnectionLostError):
+            await _discard_producer(producer)
+            raise
+        logger.info(f"Successfully sent {len(events)} events to Event Hub in "
+                    f"{sum(report['batches'] for report in partitions.values())} batches "
+                    f"across {len(partitions)} partitions")
             
         return events
         
@@ -90,6 +163,53 @@ async def simulate_trial_data(num_events: int = 1) -> list:
         logger.error(f"Error simulating trial data: {str(e)}", exc_info=True)
         raise RuntimeError(f"Error simulating trial data: {str(e)}") from e
 
+def _build_event_chunk(generator: SyntheticTrialGenerator, size: int) -> List[Tuple[str, EventData]]:
+    """Generate and wrap one chunk of bulk events (CPU-bound; run off the event loop)."""
+    return [(key, EventData(body)) for key, body in generator.generate_payloads(size, TRIAL_PARTITION_KEY)]
+
+async def simulate_bulk_trial_data(
+    num_events: int,
+    seed: Optional[int] = None,
+    chunk_size: int = int(os.getenv("BULK_SIMULATION_CHUNK_SIZE", "50000"))
+) -> Dict[str, Any]:
+    """
+    Generate and send a high volume of simulated trial events for load testing.
+
+    Events come from the vectorized SyntheticTrialGenerator as pre-serialized
+    payloads, one chunk at a time, so memory stays bounded regardless of volume.
+    Each chunk is generated and packed into EventData in a worker thread, keeping
+    the event loop free for other requests. Only counts are returned, not the
+    events themselves.
+
+    Args:
+        num_events: Total number of events to generate and send.
+        seed: Optional seed for a reproducible event stream.
+        chunk_size: Number of events generated and sent per chunk.
+    """
+    generator = SyntheticTrialGenerator(seed=seed)
+    events_sent = 0
+    batches = 0
+    partitions = set()
+    try:
+        producer = await get_producer()
+        while events_sent < num_events:
+            chunk = await asyncio.to_thread(_build_event_chunk, generator, min(chunk_size, num_events - events_sent))
+            try:
+                report = await event_sender.send(producer, chunk)
+            except (ClientClosedError, ConnectionLostError):
+                await _discard_producer(producer)
+                raise
+            events_sent += len(chunk)
+            batches += sum(partition["batches"] for partition in report.values())
+            partitions.update(report)
+        logger.info(f"Successfully sent {events_sent} bulk events to Event Hub in "
+                    f"{batches} batches across {len(partitions)} partitions")
+        return {"events_sent": events_sent, "batches": batches, "partitions": len(partitions), "seed": seed}
+
+    except Exception as e:
+        logger.error(f"Error in bulk simulation after {events_sent} events: {str(e)}", exc_info=True)
+        raise RuntimeError(f"Error in bulk simulation: {str(e)}") from e
+
 async def start_continuous_simulation(
     interval_seconds: float = 5.0,
     max_events: Optional[int] = None
@@ -0,0 +1,103 @@
+"""Partition-aware batch sender for trial events.
+
+Events are assigned to partitions by a stable hash of their partition key
+(e.g. patientId), so all events of one patient land on the same partition in
+order. Each partition's events are packed into as many size-limited batches as
+needed and sent in sequence, while different partitions are sent concurrently.
+Batches, events, bytes and send latency are tracked per partition.
+"""
+
+import asyncio
+import logging
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from azure.eventhub import EventData, EventDataBatch
+from azure.eventhub.aio import EventHubProducerClient
+from utils.telemetry import latency_recorder, tracer
+
+logger = logging.getLogger(__name__)
+
+# (partition key, serialized event body or a prepared EventData)
+Payload = Tuple[str, Union[str, bytes, EventData]]
+
+def partition_for(key: str, partition_ids: List[str]) -> str:
+    """Map a partition key to one of the partitions with a stable hash."""
+    return partition_ids[zlib.crc32(key.encode("utf-8")) % len(partition_ids)]
+
+class PartitionedSender:
+    """Splits payloads into per-partition batches and sends partitions concurrently."""
+
+    def __init__(self, send: Optional[Callable[[EventHubProducerClient, EventDataBatch], Awaitable[None]]] = None):
+        """
+        Args:
+            send: Coroutine sending one batch (e.g. wrapped in retries); defaults
+                to producer.send_batch.
+        """
+        self._send = send or (lambda producer, batch: producer.send_batch(batch))
+        self._partition_ids: Optional[List[str]] = None
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def reset(self) -> None:
+        """Forget the cached partition layout (e.g. after reconnecting)."""
+        self._partition_ids = None
+
+    async def send(self, producer: EventHubProducerClient, payloads: Iterable[Payload]) -> Dict[str, Dict[str, Any]]:
+        """Send all payloads, returning batches, events, bytes and send time per partition."""
+        if self._partition_ids is None:
+            self._partition_ids = sorted(await producer.get_partition_ids())
+        grouped: Dict[str, List[Union[str, bytes, EventData]]] = {}
+        for key, body in payloads:
+            grouped.setdefault(partition_for(key, self._partition_ids), []).append(body)
+
+        with tracer.start_as_current_span("send_partitioned_events") as span:
+            span.set_attribute("eventhubs.partitions", len(grouped))
+            reports = await asyncio.gather(*(
+                self._send_partition(producer, partition_id, bodies)
+                for partition_id, bodies in grouped.items()
+            ))
+        return dict(zip(grouped, reports))
+
+    async def _send_partition(
+        self,
+        producer: EventHubProducerClient,
+        partition_id: str,
+        bodies: List[Union[str, bytes, EventData]]
+    ) -> Dict[str, Any]:
+        report = {"batches": 0, "events": 0, "bytes": 0, "send_ms": 0.0}
+        batch = await producer.create_batch(partition_id=partition_id)
+        for body in bodies:
+            event = body if isinstance(body, EventData) else EventData(body)
+            try:
+                batch.add(event)
+            except ValueError:
+                # Batch is full: send it and start the next one
+                if len(batch) == 0:
+                    raise ValueError("A single event exceeds the maximum batch size")
+                await self._send_batch(producer, partition_id, batch, report)
+                batch = await producer.create_batch(partition_id=partition_id)
+                batch.add(event)
+        if len(batch):
+            await self._send_batch(producer, partition_id, batch, report)
+        return report
+
+    async def _send_batch(
+        self,
+        producer: EventHubProducerClient,
+        partition_id: str,
+        batch: EventDataBatch,
+        report: Dict[str, Any]
+    ) -> None:
+        started_at = time.perf_counter()
+        await self._send(producer, batch)
+        elapsed = time.perf_counter() - started_at
+        latency_recorder.record("eventhubs.send_batch", elapsed)
+        report["batches"] += 1
+        report["events"] += len(batch)
+        report["bytes"] += batch.size_in_bytes
+        report["send_ms"] = round(report["send_ms"] + elapsed * 1000, 1)
+        totals = self.stats.setdefault(partition_id, {"batches": 0, "events": 0, "bytes": 0, "send_ms": 0.0})
+        totals["batches"] += 1
+        totals["events"] += len(batch)
+        totals["bytes"] += batch.size_in_bytes
+        totals["send_ms"] = round(totals["send_ms"] + elapsed * 1000, 1)
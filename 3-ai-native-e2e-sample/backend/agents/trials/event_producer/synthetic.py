@@ -0,0 +1,150 @@
+"""Vectorized Synthetic Trial Event Generator.
+
+Generates large volumes of simulated trial events for load testing. Instead of
+building one event at a time from several random calls, every field of a chunk
+of events is sampled at once with numpy, and the events are emitted directly as
+serialized JSON payloads ready to be sent to Event Hubs.
+
+Output is reproducible for a given seed, and the vitals distributions,
+adverse-event rate and trial/patient cardinality are configurable.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import numpy as np
+
+# Normal distribution (mean, standard deviation), clipped to [min, max], per vital sign
+DEFAULT_VITALS: Dict[str, Dict[str, float]] = {
+    "heartRate": {"mean": 80, "sd": 10, "min": 40, "max": 180},
+    "systolic": {"mean": 125, "sd": 12, "min": 70, "max": 220},
+    "diastolic": {"mean": 75, "sd": 8, "min": 40, "max": 130},
+    "temperature": {"mean": 36.7, "sd": 0.4, "min": 34.0, "max": 41.0},
+    "respiratoryRate": {"mean": 16, "sd": 2.5, "min": 8, "max": 40},
+    "oxygenSaturation": {"mean": 97.5, "sd": 1.5, "min": 80, "max": 100},
+}
+
+STUDY_ARMS = ("Drug A", "Drug B", "Placebo")
+SEVERITIES = ("Mild", "Moderate", "Severe")
+DESCRIPTIONS = ("Headache", "Nausea", "Fatigue", "Dizziness", None)
+
+# First timestamp of seeded streams, so the same seed always yields the same payloads
+SEEDED_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+_EVENT_TEMPLATE = (
+    '{"trialId":"CTO%03d","patientId":"P%03d","studyArm":"%s","timestamp":"%s",'
+    '"vitals":{"heartRate":%d,"bloodPressure":"%d/%d","temperature":%.1f,'
+    '"respiratoryRate":%d,"oxygenSaturation":%d},"adverseEvents":%s}'
+)
+
+class SyntheticTrialGenerator:
+    """Seedable, array-based generator of simulated trial events."""
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        num_trials: int = 1000,
+        num_patients: int = 1000,
+        adverse_event_rate: float = 0.3,
+        vitals: Optional[Dict[str, Dict[str, float]]] = None,
+        severity_weights: Sequence[float] = (0.6, 0.3, 0.1),
+        description_weights: Sequence[float] = (0.2, 0.2, 0.15, 0.15, 0.3),
+        start: Optional[datetime] = None,
+        interval_ms: float = 10.0
+    ):
+        """
+        Args:
+            seed: Seed for reproducible output; None draws fresh entropy.
+            num_trials: Number of distinct trial IDs.
+            num_patients: Number of distinct patient IDs.
+            adverse_event_rate: Probability that an event reports an adverse event.
+            vitals: Per-vital overrides of DEFAULT_VITALS (mean, sd, min, max).
+            severity_weights: Relative frequency of SEVERITIES.
+            description_weights: Relative frequency of DESCRIPTIONS (None = unspecified).
+            start: Timestamp of the first event (naive values are taken as UTC);
+                defaults to SEEDED_START when a seed is given, otherwise now.
+            interval_ms: Mean time between consecutive events.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.num_trials = num_trials
+        self.num_patients = num_patients
+        self.adverse_event_rate = adverse_event_rate
+        self.vitals = {name: {**spec, **(vitals or {}).get(name, {})} for name, spec in DEFAULT_VITALS.items()}
+        self.severity_p = np.asarray(severity_weights, dtype=float) / np.sum(severity_weights)
+        self.description_p = np.asarray(description_weights, dtype=float) / np.sum(description_weights)
+        if start is None:
+            start = SEEDED_START if seed is not None else datetime.now(timezone.utc)
+        if start.tzinfo is not None:
+            start = start.astimezone(timezone.utc).replace(tzinfo=None)
+        self._next_time = np.datetime64(start, "ms")
+        self.interval_ms = interval_ms
+        # Every possible adverseEvents value, pre-serialized; index 0 means none
+        self._adverse_events = ["[]"] + [
+            json.dumps([{"type": severity, "description": description}], separators=(",", ":"))
+            for severity in SEVERITIES
+            for description in DESCRIPTIONS
+        ]
+
+    def _sample_vital(self, name: str, size: int) -> np.ndarray:
+        spec = self.vitals[name]
+        values = self.rng.normal(spec["mean"], spec["sd"], size)
+        return np.clip(values, spec["min"], spec["max"])
+
+    def generate_columns(self, size: int) -> Dict[str, np.ndarray]:
+        """Sample the fields of size events as arrays (one entry per event)."""
+        rng = self.rng
+        offsets = np.cumsum(rng.exponential(self.interval_ms, size)).astype("timedelta64[ms]")
+        timestamps = self._next_time + offsets
+        self._next_time = timestamps[-1] if size else self._next_time
+
+        has_adverse_event = rng.random(size) < self.adverse_event_rate
+        severity = rng.choice(len(SEVERITIES), size, p=self.severity_p)
+        description = rng.choice(len(DESCRIPTIONS), size, p=self.description_p)
+        adverse_event = np.where(has_adverse_event, 1 + severity * len(DESCRIPTIONS) + description, 0)
+
+        return {
+            "trial": rng.integers(1, self.num_trials + 1, size),
+            "patient": rng.integers(1, self.num_patients + 1, size),
+            "arm": rng.integers(0, len(STUDY_ARMS), size),
+            "timestamp": np.datetime_as_string(timestamps, unit="ms", timezone="UTC"),
+            "heartRate": np.rint(self._sample_vital("heartRate", size)).astype(int),
+            "systolic": np.rint(self._sample_vital("systolic", size)).astype(int),
+            "diastolic": np.rint(self._sample_vital("diastolic", size)).astype(int),
+            "temperature": np.round(self._sample_vital("temperature", size), 1),
+            "respiratoryRate": np.rint(self._sample_vital("respiratoryRate", size)).astype(int),
+            "oxygenSaturation": np.rint(self._sample_vital("oxygenSaturation", size)).astype(int),
+            "adverseEvent": adverse_event,
+        }
+
+    def generate_payloads(self, size: int, partition_key: str = "patientId") -> List[Tuple[str, bytes]]:
+        """Generate size events as (partition key, serialized JSON) pairs."""
+        columns = {name: values.tolist() for name, values in self.generate_columns(size).items()}
+        arms = [STUDY_ARMS[arm] for arm in columns["arm"]]
+        adverse_events = [self._adverse_events[index] for index in columns["adverseEvent"]]
+        keys = (
+            ["CTO%03d" % trial for trial in columns["trial"]] if partition_key == "trialId"
+            else ["P%03d" % patient for patient in columns["patient"]]
+        )
+        rows = zip(
+            columns["trial"], columns["patient"], arms, columns["timestamp"],
+            columns["heartRate"], columns["systolic"], columns["diastolic"], columns["temperature"],
+            columns["respiratoryRate"], columns["oxygenSaturation"], adverse_events
+        )
+        return [(key, (_EVENT_TEMPLATE % row).encode("utf-8")) for key, row in zip(keys, rows)]
+
+    def iter_payloads(
+        self,
+        total: int,
+        chunk_size: int = 50_000,
+        partition_key: str = "patientId"
+    ) -> Iterator[List[Tuple[str, bytes]]]:
+        """Stream total events as chunks of ready-to-send payloads."""
+        remaining = total
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            yield self.generate_payloads(size, partition_key)
+            remaining -= size
+
+    def generate_events(self, size: int) -> List[Dict[str, Any]]:
+        """Generate size events as dicts (parsed payloads), e.g. for tests."""
+        return [json.loads(body) for _, body in self.generate_payloads(size)]
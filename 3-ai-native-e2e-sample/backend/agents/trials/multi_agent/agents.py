@@ -1,33 +1,81 @@
 """
 This module implements the specialized agents for clinical trial event analysis.
 Each agent is responsible for a specific task in the workflow:
+  - TeamLeaderAgent: Coordinates the analysis of incoming trial events.
   - VitalsAgent: Processes patient vital signs.
   - AdverseEventAgent: Assesses adverse events.
   - DataSummaryAgent: Summarizes overall trial data.
 These agents are coordinated by the TrialAgentCoordinator.
 """
 
-from typing import Dict, Any
+import asyncio
+import json
+from typing import Dict, Any, List, Optional
 from opentelemetry import trace
-from azure.ai.projects import AIProjectClient
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.projects.models import MessageRole
+from agents.rate_limit import Priority, estimate_tokens, rate_limiter
+from agents.reaper import ACTIVE_RUN_STATUSES, resource_reaper
+from agents.registry import AgentDefinition, AgentRegistry, agent_registry
+from utils.resilience import RetryPolicy, call_with_retry, get_breaker, is_transient
 
 tracer = trace.get_tracer(__name__)
 
+# Adaptive run polling: fast right after the run starts, slower afterwards
+RUN_POLL_INITIAL_DELAY = 0.25
+RUN_POLL_BACKOFF = 1.5
+RUN_POLL_MAX_DELAY = 2.0
+
+# last_error codes of failed runs that are likely to succeed on retry
+RETRYABLE_RUN_ERROR_CODES = {"rate_limit_exceeded", "server_error"}
+
+class AgentRunError(RuntimeError):
+    """An agent run ended in the failed state."""
+
+    def __init__(self, last_error: Any):
+        super().__init__(f"Agent run failed: {last_error}")
+        self.code = getattr(last_error, "code", None)
+
+def is_retryable_run_error(error: BaseException) -> bool:
+    """Whether an agent call is worth retrying: a transient SDK error, or a run
+    that failed because the model was throttled or unavailable."""
+    if isinstance(error, AgentRunError):
+        return error.code in RETRYABLE_RUN_ERROR_CODES
+    return is_transient(error)
+
 class SpecializedAgent:
     """Base class for specialized trial analysis agents."""
     
-    def __init__(self, project_client: AIProjectClient, model: str, instructions: str):
+    # Agent name in the project; existing agents with this name (and the same
+    # definition) are reused through the agent registry
+    name = "trial-agent"
+    
+    def __init__(
+        self,
+        project_client: AIProjectClient,
+        model: str,
+        instructions: str,
+        registry: Optional[AgentRegistry] = None
+    ):
         self.project_client = project_client
         self.model = model
         self.instructions = instructions
+        self.registry = registry or agent_registry
+        self.retry_policy = RetryPolicy.from_env(retry_on=is_retryable_run_error)
         self._agent = None
     
+    @property
+    def is_ready(self) -> bool:
+        """Whether the agent has been resolved in Azure AI Foundry."""
+        return self._agent is not None
+    
     async def initialize(self) -> None:
-        """Initialize the agent with Azure AI Foundry."""
-        self._agent = await self.project_client.agents.create_agent(
+        """Initialize the agent with Azure AI Foundry, reusing an existing agent when possible."""
+        self._agent = await self.registry.get_agent(self.project_client, AgentDefinition(
+            name=self.name,
             model=self.model,
             instructions=self.instructions
-        )
+        ))
     
     async def process_message(self, message: str) -> Dict[str, Any]:
         """Process a message using the agent.
@@ -45,8 +93,16 @@ class SpecializedAgent:
                     
                 if not self._agent:
                     raise RuntimeError("Failed to initialize agent")
-                    
-                response = await self._agent.process_message(message)
+                
+                span.set_attribute("agent.id", self._agent.id)
+                # Only calls that actually reach the agents go through the trial_agents
+                # breaker, so locally handled events cannot close it
+                response = await call_with_retry(
+                    lambda: self._run(message),
+                    self.retry_policy,
+                    get_breaker("trial_agents"),
+                    name=f"{self.name} run"
+                )
                 return {"response": response, "agent_type": self.__class__.__name__}
                 
             except Exception as e:
@@ -54,9 +110,67 @@ class SpecializedAgent:
                 span.record_exception(e)
                 raise
 
+    async def _run(self, message: str) -> Optional[str]:
+        """Run the agent once on a new thread and return its reply."""
+        thread = await self.project_client.agents.create_thread()
+        resource_reaper.track_thread(thread.id)
+        await self.project_client.agents.create_message(
+            thread_id=thread.id,
+            role="user",
+            content=message
+        )
+        # Background priority: trial events only use capacity left by interactive requests
+        reservation = await rate_limiter.acquire(
+            self.model,
+            estimate_tokens(self.instructions + message),
+            Priority.BACKGROUND
+        )
+        run = None
+        try:
+            # The run is created and polled here rather than with create_and_process_run
+            # so that it is known to the reaper and can be cancelled if this call is
+            # (e.g. by the coordinator's per-agent timeout)
+            run = await self.project_client.agents.create_run(
+                thread_id=thread.id,
+                assistant_id=self._agent.id
+            )
+            resource_reaper.track_run(thread.id, run.id)
+            delay = RUN_POLL_INITIAL_DELAY
+            while run.status in ACTIVE_RUN_STATUSES:
+                await asyncio.sleep(delay)
+                delay = min(delay * RUN_POLL_BACKOFF, RUN_POLL_MAX_DELAY)
+                run = await self.project_client.agents.get_run(thread_id=thread.id, run_id=run.id)
+        finally:
+            if run is not None and run.status in ACTIVE_RUN_STATUSES:
+                # Stop the run server-side when it was abandoned before finishing
+                resource_reaper.cancel_run(self.project_client, thread.id, run.id)
+            # Reconcile the token estimate even if the run failed, timed out or was cancelled
+            reservation.settle(run)
+        if run.status == "failed":
+            raise AgentRunError(run.last_error)
+        
+        messages = await self.project_client.agents.list_messages(thread_id=thread.id)
+        last_message = messages.get_last_text_message_by_role(MessageRole.AGENT)
+        return last_message.text.value if last_message else None
+
+class TeamLeaderAgent(SpecializedAgent):
+    """Agent coordinating the overall analysis of trial events."""
+    
+    name = "trial-team-leader"
+    
+    def __init__(self, project_client: AIProjectClient, model: str):
+        super().__init__(
+            project_client=project_client,
+            model=model,
+            instructions="""You are the Team Leader agent coordinating trial analysis.
+            Analyze incoming trial events and delegate tasks to specialized agents."""
+        )
+
 class VitalsAgent(SpecializedAgent):
     """Agent specialized in analyzing patient vital signs."""
     
+    name = "trial-vitals"
+    
     def __init__(self, project_client: AIProjectClient, model: str):
         super().__init__(
             project_client=project_client,
@@ -68,6 +182,8 @@ class VitalsAgent(SpecializedAgent):
 class AdverseEventAgent(SpecializedAgent):
     """Agent specialized in assessing adverse events."""
     
+    name = "trial-adverse-events"
+    
     def __init__(self, project_client: AIProjectClient, model: str):
         super().__init__(
             project_client=project_client,
@@ -79,6 +195,8 @@ class AdverseEventAgent(SpecializedAgent):
 class DataSummaryAgent(SpecializedAgent):
     """Agent specialized in summarizing trial data."""
     
+    name = "trial-data-summary"
+    
     def __init__(self, project_client: AIProjectClient, model: str):
         super().__init__(
             project_client=project_client,
@@ -86,3 +204,53 @@ class DataSummaryAgent(SpecializedAgent):
             instructions="""You are a clinical trial data analyst specialized in summarizing trial events.
             Generate concise summaries of trial data and identify key patterns or trends."""
         )
+    
+    async def summarize_batch(self, events: List[Dict[str, Any]]) -> List[Any]:
+        """Summarize several trial events with a single agent call.
+        
+        The events are sent as one compact JSON payload keyed by position and the
+        agent is asked for a JSON object mapping each key to its summary, which is
+        then demultiplexed back into one result per event.
+        
+        Returns:
+            One result per event, in order; events missing from the agent's reply
+            get a RuntimeError instead of a result.
+        """
+        payload = {
+            str(index): {key: event.get(key) for key in BATCH_SUMMARY_FIELDS}
+            for index, event in enumerate(events)
+        }
+        message = (
+            "Summarize each of these trial events. Respond with only a JSON object that maps "
+            "each event key to a concise summary string, with no markdown.\n"
+            + json.dumps(payload, separators=(",", ":"), default=str)
+        )
+        result = await self.process_message(message)
+        summaries = _parse_json_object(result.get("response"))
+        outputs = []
+        for index in range(len(events)):
+            summary = summaries.get(str(index))
+            if summary:
+                outputs.append({"response": summary, "agent_type": self.__class__.__name__, "batch_size": len(events)})
+            else:
+                outputs.append(RuntimeError("No summary returned for event in batch"))
+        return outputs
+
+# Event fields sent to the summary agent in batched requests; identifiers are left
+# out because summaries are shared between patients through the analysis cache
+BATCH_SUMMARY_FIELDS = ("studyArm", "vitals", "adverseEvents")
+
+def _parse_json_object(text: Optional[str]) -> Dict[str, Any]:
+    """Parse a JSON object from an agent reply, tolerating markdown code fences."""
+    if not text:
+        return {}
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[len("json"):]
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
@@ -0,0 +1,119 @@
+"""
+Trial Analysis Cache
+
+Many trial events repeat the same clinical picture. This cache stores the
+agents' analysis under a canonical fingerprint of the clinically relevant
+fields only: vitals binned to configurable widths, adverse event types and
+descriptions, and the study arm. Patient IDs, trial IDs and timestamps are
+excluded, so equivalent events from different patients share one analysis.
+
+Because a cached analysis is served for other patients, the agents must only
+see what the fingerprint covers: clinical_view() returns exactly those fields
+(with vitals as their bin ranges), and both the fingerprint and the agent
+prompts are built from it.
+
+Bin widths can be overridden with the TRIAL_CACHE_BINS environment variable,
+a JSON object using the keys of DEFAULT_BIN_WIDTHS.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Optional
+from utils.cache import TTLCache
+from agents.trials.triage import parse_blood_pressure
+
+logger = logging.getLogger(__name__)
+
+# Width of the bins vitals are rounded into before fingerprinting
+DEFAULT_BIN_WIDTHS: Dict[str, float] = {
+    "heartRate": 10,
+    "systolic": 10,
+    "diastolic": 10,
+    "temperature": 0.5,
+    "respiratoryRate": 4,
+    "oxygenSaturation": 2,
+}
+
+def _bin(value: Any, width: float) -> Optional[str]:
+    """Render a value as the [low, high) bin it falls into, e.g. "100-110"."""
+    if not isinstance(value, (int, float)) or width <= 0:
+        return None
+    low = math.floor(value / width) * width
+    return f"{low:g}-{low + width:g}"
+
+class TrialAnalysisCache:
+    """Bounded TTL cache of agent analyses keyed by event fingerprint."""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 600.0,
+        bin_widths: Optional[Dict[str, float]] = None
+    ):
+        self.bin_widths = {**DEFAULT_BIN_WIDTHS, **(bin_widths or {})}
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    @classmethod
+    def from_env(cls) -> "TrialAnalysisCache":
+        """Create a cache configured from TRIAL_CACHE_* environment variables."""
+        bin_widths = None
+        if raw := os.getenv("TRIAL_CACHE_BINS"):
+            try:
+                bin_widths = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logger.error("Invalid TRIAL_CACHE_BINS, using defaults: %s", str(e))
+        return cls(
+            max_size=int(os.getenv("TRIAL_CACHE_MAX_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("TRIAL_CACHE_TTL_SECONDS", "600")),
+            bin_widths=bin_widths
+        )
+
+    def clinical_view(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the de-identified, binned fields of an event that its fingerprint covers."""
+        vitals = event.get("vitals") or {}
+        blood_pressure = parse_blood_pressure(vitals.get("bloodPressure"))
+        values = {
+            "heartRate": vitals.get("heartRate"),
+            "systolic": blood_pressure[0] if blood_pressure else None,
+            "diastolic": blood_pressure[1] if blood_pressure else None,
+            "temperature": vitals.get("temperature"),
+            "respiratoryRate": vitals.get("respiratoryRate"),
+            "oxygenSaturation": vitals.get("oxygenSaturation"),
+        }
+        adverse_events = sorted(
+            (str(adverse_event.get("type") or "").lower(), str(adverse_event.get("description") or "").lower())
+            for adverse_event in event.get("adverseEvents") or []
+        )
+        return {
+            "studyArm": event.get("studyArm"),
+            "vitals": {key: _bin(value, self.bin_widths[key]) for key, value in values.items()},
+            "adverseEvents": [
+                {"type": event_type, "description": description}
+                for event_type, description in adverse_events
+            ],
+        }
+
+    def fingerprint(self, event: Dict[str, Any], *qualifiers: Any) -> str:
+        """Return the canonical fingerprint of an event's clinically relevant fields.
+
+        Args:
+            event: The trial event.
+            qualifiers: Extra values that change the analysis performed for the
+                event (e.g. which agents were involved) and must be part of the key.
+        """
+        canonical = {**self.clinical_view(event), "qualifiers": list(qualifiers)}
+        encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+
+    def set(self, key: str, analysis: Dict[str, Any]) -> None:
+        self._cache.set(key, analysis)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit, miss, eviction and expiration counts."""
+        return self._cache.stats()
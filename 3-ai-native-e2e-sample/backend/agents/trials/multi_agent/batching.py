@@ -0,0 +1,90 @@
+"""
+Micro-batching for trial agent calls.
+
+Collects individual requests into small batches bounded by size and by a
+maximum wait, hands each batch to a single batch-processing coroutine and
+routes the per-item results back to their callers. At high event rates this
+replaces one agent call per event with one call per batch.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+from utils.telemetry import tracer
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Groups submitted items into batches processed by one call each."""
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 250.0,
+        name: str = "batch"
+    ):
+        """
+        Args:
+            process_batch: Coroutine function receiving a list of items and returning
+                one result per item, in order. A result that is an Exception is
+                raised to that item's caller only.
+            max_batch_size: A batch is flushed as soon as it holds this many items.
+            max_wait_ms: A partial batch is flushed after this many milliseconds.
+            name: Name used for spans and logs.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.stats = {"batches": 0, "items": 0}
+
+    async def submit(self, item: Any) -> Any:
+        """Add an item to the current batch and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_wait())
+        return await future
+
+    async def _flush_after_wait(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._process(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        with tracer.start_as_current_span(f"micro_batch.{self.name}") as span:
+            span.set_attribute("batch.size", len(batch))
+            self.stats["batches"] += 1
+            self.stats["items"] += len(batch)
+            try:
+                results = await self.process_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Expected {len(batch)} results, got {len(results)}")
+            except Exception as e:
+                logger.error("❌ %s batch of %d failed: %s", self.name, len(batch), str(e))
+                span.record_exception(e)
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    # The caller gave up (e.g. timed out) before the batch completed
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
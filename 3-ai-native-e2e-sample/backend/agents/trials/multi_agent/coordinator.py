@@ -1,8 +1,16 @@
-from typing import Dict, Any, List
-from azure.ai.projects import AIProjectClient
-from azure.ai.inference import InferenceClient
+import asyncio
+import os
+import time
+from typing import Awaitable, Dict, Any, List, Optional, Tuple
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.inference.aio import ChatCompletionsClient
 from opentelemetry import trace
+from utils.resilience import CircuitOpenError
 from utils.telemetry import tracer
+from agents.trials.triage import TrialEventTriage, TriageResult, templated_analysis
+from .agents import AdverseEventAgent, DataSummaryAgent, TeamLeaderAgent, VitalsAgent
+from .analysis_cache import TrialAnalysisCache
+from .batching import MicroBatcher
 
 class TrialAgentCoordinator:
     """
@@ -16,44 +24,71 @@ class TrialAgentCoordinator:
     - Incorporating telemetry for tracing, error capturing, and performance insights.
     """
     
-    def __init__(self, project_client: AIProjectClient, inference_client: InferenceClient):
+    def __init__(
+        self,
+        project_client: AIProjectClient,
+        inference_client: Optional[ChatCompletionsClient] = None,
+        agent_timeout: float = float(os.getenv("TRIAL_AGENT_TIMEOUT_SECONDS", "30")),
+        model: Optional[str] = None,
+        triage: Optional[TrialEventTriage] = None,
+        analysis_cache: Optional[TrialAnalysisCache] = None
+    ):
         self.project_client = project_client
         self.inference_client = inference_client
-        self.agents = {}
+        # Model deployment shared by every trial agent
+        self.model = model or os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4o")
+        self.agents = {
+            "team_leader": TeamLeaderAgent(project_client, self.model),
+            "vitals": VitalsAgent(project_client, self.model),
+            "adverse_events": AdverseEventAgent(project_client, self.model),
+            "data_summary": DataSummaryAgent(project_client, self.model),
+        }
+        # Maximum time a single specialized agent may take for one event
+        self.agent_timeout = agent_timeout
+        # Local rule-based stage deciding which events need the agents at all
+        self.triage = triage or TrialEventTriage.from_env()
+        self.stats = {"events_escalated": 0, "events_templated": 0}
+        # Agent analyses reused for events with the same clinical picture
+        self.analysis_cache = analysis_cache or TrialAnalysisCache.from_env()
+        # Summary requests are gathered into micro-batches of up to TRIAL_SUMMARY_BATCH_SIZE
+        # events, waiting at most TRIAL_SUMMARY_BATCH_WAIT_MS for a batch to fill
+        self.summary_batcher = MicroBatcher(
+            self.agents["data_summary"].summarize_batch,
+            max_batch_size=int(os.getenv("TRIAL_SUMMARY_BATCH_SIZE", "16")),
+            max_wait_ms=float(os.getenv("TRIAL_SUMMARY_BATCH_WAIT_MS", "250")),
+            name="data_summary"
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether every agent has been initialized (warm)."""
+        return all(agent.is_ready for agent in self.agents.values())
+
+    def readiness(self) -> Dict[str, bool]:
+        """Return the warm/cold state of each agent."""
+        return {key: agent.is_ready for key, agent in self.agents.items()}
 
     async def initialize_agents(self):
         """
         Initializes all agents required for processing trial events.
         
         Process:
-        1. Creates a 'team_leader' agent responsible for coordinating task delegation.
-        2. Instantiates specialized agents:
+        1. Resolves the 'team_leader' agent responsible for coordinating task delegation.
+        2. Resolves the specialized agents:
            - 'vitals' for analyzing patient vital signs.
            - 'adverse_events' for assessing potential adverse effects.
            - 'data_summary' for aggregating and summarizing overall event data.
         
+        All agents are resolved concurrently through the agent registry, which reuses
+        existing agents with the same name and definition instead of creating new ones.
+        This is called on application startup so the first consumed event hits warm agents.
+        
         Telemetry:
         - Uses telemetry spans to record the process duration and any initialization errors.
         """
         with tracer.start_as_current_span("initialize_trial_agents") as span:
             try:
-                # Create Team Leader agent
-                self.agents["team_leader"] = await self.project_client.agents.create_agent(
-                    model="gpt-4o",
-                    instructions="""You are the Team Leader agent coordinating trial analysis.
-                    Analyze incoming trial events and delegate tasks to specialized agents."""
-                )
-                # Create specialized agents with specific roles
-                agent_specs = {
-                    "vitals": "Analyze patient vital signs and identify anomalies",
-                    "adverse_events": "Monitor and assess adverse events",
-                    "data_summary": "Aggregate and summarize trial data trends"
-                }
-                for agent_id, instructions in agent_specs.items():
-                    self.agents[agent_id] = await self.project_client.agents.create_agent(
-                        model="gpt-4o",
-                        instructions=instructions
-                    )
+                await asyncio.gather(*(agent.initialize() for agent in self.agents.values()))
                 span.set_attribute("agents.initialized", len(self.agents))
                 return True
             except Exception as e:
@@ -66,22 +101,42 @@ class TrialAgentCoordinator:
         Processes an incoming trial event through the multi-agent system.
         
         Workflow:
-        1. Delegates the event to the team leader agent via _delegate_tasks.
-        2. Aggregates responses (including agent outputs and event metadata) into a structured analysis result.
-        3. Telemetry is used to track process completion and capture any errors.
+        1. Triages the event locally against clinical thresholds; routine events
+           (normal vitals, no adverse events) get a templated analysis without any agent call.
+        2. Serves escalated events whose clinical fingerprint was recently analyzed from
+           the analysis cache; otherwise delegates them to the team leader agent via _delegate_tasks.
+        3. Aggregates responses (including agent outputs and event metadata) into a structured analysis result.
+        4. Telemetry is used to track process completion and capture any errors.
         
         Returns:
             A dictionary containing the event id, timestamp, aggregated agent analysis, and additional recommendations.
         """
         with tracer.start_as_current_span("process_trial_event") as span:
             try:
-                # Get analysis from team leader after delegating tasks
-                leader_response = await self._delegate_tasks(event)
+                triage = self.triage.assess(event)
+                span.set_attribute("triage.score", triage.score)
+                span.set_attribute("triage.escalated", triage.escalate)
+                if not triage.escalate:
+                    self.stats["events_templated"] += 1
+                    span.set_attribute("event.processed", True)
+                    return templated_analysis(event, triage)
+
+                self.stats["events_escalated"] += 1
+                cache_key = self.analysis_cache.fingerprint(event, triage.vitals_abnormal)
+                leader_response = self.analysis_cache.get(cache_key)
+                span.set_attribute("analysis.cache_hit", leader_response is not None)
+                if leader_response is None:
+                    # Get analysis from team leader after delegating tasks
+                    leader_response = await self._delegate_tasks(event, triage)
+                    # Partial results are not cached so the failed agents are retried next time
+                    if "errors" not in leader_response:
+                        self.analysis_cache.set(cache_key, leader_response)
                 analysis = {
                     "event_id": event.get("id"),
                     "timestamp": event.get("timestamp"),
                     "analysis": leader_response,
-                    "recommendations": []
+                    "recommendations": [],
+                    "triage": triage.as_dict()
                 }
                 span.set_attribute("event.processed", True)
                 return analysis
@@ -90,43 +145,97 @@ class TrialAgentCoordinator:
                 span.record_exception(e)
                 raise
 
-    async def _delegate_tasks(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    async def _delegate_tasks(self, event: Dict[str, Any], triage: Optional[TriageResult] = None) -> Dict[str, Any]:
         """
         Delegates specific analysis tasks to the appropriate specialized agents.
         
+        The agents only see the event's clinical view (study arm, binned vitals and
+        adverse events, no identifiers), the same fields the analysis cache keys on,
+        so a cached analysis never refers to another patient or trial.
+        
         For a given trial event:
-        - If available, the 'vitals' agent processes vital sign data.
+        - If available (and not already found normal by triage), the 'vitals' agent processes vital sign data.
         - If there are adverse events, the 'adverse_events' agent assesses their details.
-        - Independently, the 'data_summary' agent generates an overall event summary.
+        - Independently, the 'data_summary' agent generates an overall event summary. Summary
+          requests from concurrent events are micro-batched into a single agent call.
         
-        Each agent's response is collected and the total number of processed tasks is logged via telemetry.
+        The agents are independent, so they are dispatched concurrently, each with its
+        own timeout. A slow or failing agent does not discard the other agents' analysis:
+        its failure is reported under "errors" and only an event for which every agent
+        failed raises: CircuitOpenError if the agents' breaker refused every call,
+        RuntimeError otherwise.
         
         Returns:
             A dictionary mapping analysis types to responses returned by each agent.
         """
         with tracer.start_as_current_span("delegate_trial_tasks") as span:
             try:
-                responses = {}
+                tasks = {}
+                view = self.analysis_cache.clinical_view(event)
                 # Process vital signs using the 'vitals' agent
-                if "vitals" in event:
-                    vitals_response = await self.agents["vitals"].process_message(
-                        f"Analyze these vital signs: {event['vitals']}"
-                    )
-                    responses["vitals_analysis"] = vitals_response
+                if "vitals" in event and (triage is None or triage.vitals_abnormal):
+                    tasks["vitals_analysis"] = ("vitals", self.agents["vitals"].process_message(
+                        f"Analyze these vital signs (value ranges): {view['vitals']}"
+                    ))
                 # Process adverse events if present
                 if "adverseEvents" in event and event["adverseEvents"]:
-                    adverse_response = await self.agents["adverse_events"].process_message(
-                        f"Assess these adverse events: {event['adverseEvents']}"
-                    )
-                    responses["adverse_events_analysis"] = adverse_response
+                    tasks["adverse_events_analysis"] = ("adverse_events", self.agents["adverse_events"].process_message(
+                        f"Assess these adverse events: {view['adverseEvents']}"
+                    ))
                 # Always generate a summary of the trial event data
-                summary_response = await self.agents["data_summary"].process_message(
-                    f"Summarize this trial event data: {event}"
-                )
-                responses["summary"] = summary_response
+                tasks["summary"] = ("data_summary", self.summary_batcher.submit(view))
+
+                results = await asyncio.gather(*(
+                    self._run_agent_task(agent_key, call)
+                    for agent_key, call in tasks.values()
+                ))
+
+                responses = {}
+                errors = {}
+                for result_key, (response, error) in zip(tasks, results):
+                    if error is None:
+                        responses[result_key] = response
+                    else:
+                        errors[result_key] = str(error)
                 span.set_attribute("tasks.completed", len(responses))
+                span.set_attribute("tasks.failed", len(errors))
+                if not responses:
+                    rejected = [error for _, error in results if isinstance(error, CircuitOpenError)]
+                    if len(rejected) == len(results):
+                        # The agents are unavailable rather than the event bad
+                        raise rejected[0]
+                    raise RuntimeError(f"All agent tasks failed: {errors}")
+                if errors:
+                    responses["errors"] = errors
                 return responses
             except Exception as e:
                 span.set_status(trace.Status(trace.StatusCode.ERROR))
                 span.record_exception(e)
-                raise
\ No newline at end of file
+                raise
+
+    async def _run_agent_task(self, agent_key: str, call: Awaitable[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+        """
+        Runs a single agent task under its own span and timeout.
+        
+        Returns:
+            A (response, error) tuple where exactly one element is set.
+        """
+        with tracer.start_as_current_span(f"agent_task.{agent_key}") as span:
+            span.set_attribute("agent.name", agent_key)
+            started_at = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(call, timeout=self.agent_timeout)
+                return response, None
+            except asyncio.TimeoutError:
+                error = f"{agent_key} agent timed out after {self.agent_timeout}s"
+                span.set_status(trace.Status(trace.StatusCode.ERROR, error))
+                return None, asyncio.TimeoutError(error)
+            except CircuitOpenError as e:
+                span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+                return None, e
+            except Exception as e:
+                span.set_status(trace.Status(trace.StatusCode.ERROR))
+                span.record_exception(e)
+                return None, RuntimeError(f"{agent_key} agent failed: {str(e)}")
+            finally:
+                span.set_attribute("agent.latency_ms", round((time.perf_counter() - started_at) * 1000, 1))
@@ -0,0 +1,99 @@
+"""
+Trial Agent Pipeline Lifecycle
+
+Owns the process-wide TrialAgentCoordinator and TrialEventsConsumer. On
+application startup the coordinator's agents are initialized concurrently and,
+once they are warm, the Event Hubs consumer starts receiving, so the first
+consumed event never pays agent creation. Readiness of the pipeline is reported
+through pipeline_status().
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.inference.aio import ChatCompletionsClient
+from agents.trials.multi_agent.coordinator import TrialAgentCoordinator
+
+logger = logging.getLogger(__name__)
+
+# Set to false to skip agent warm-up and event consumption (e.g. for UI-only development)
+TRIAL_AGENTS_ENABLED = os.getenv("TRIAL_AGENTS_ENABLED", "true").lower() == "true"
+
+coordinator: Optional[TrialAgentCoordinator] = None
+consumer = None
+_tasks: Dict[str, asyncio.Task] = {}
+_warmup_error: Optional[str] = None
+
+async def _warm_up_and_consume() -> None:
+    """Initialize the coordinator's agents, then start consuming trial events."""
+    global consumer, _warmup_error
+    _warmup_error = None
+    try:
+        await coordinator.initialize_agents()
+        logger.info("🔥 Trial agents warm: %s", coordinator.readiness())
+    except Exception as e:
+        _warmup_error = str(e)
+        logger.error("❌ Trial agent warm-up failed: %s", str(e), exc_info=True)
+        return
+
+    try:
+        # Imported lazily: the consumer requires Event Hubs configuration
+        from agents.trials.event_consumer.consumer import TrialEventsConsumer
+        consumer = TrialEventsConsumer(coordinator)
+        await consumer.start_receiving()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        _warmup_error = str(e)
+        logger.error("❌ Trial event consumer failed: %s", str(e), exc_info=True)
+
+def start_trial_pipeline(project_client: AIProjectClient, chat_client: Optional[ChatCompletionsClient] = None) -> None:
+    """Create the coordinator and warm it up in the background."""
+    global coordinator
+    if not TRIAL_AGENTS_ENABLED:
+        logger.info("Trial agents disabled (TRIAL_AGENTS_ENABLED=false)")
+        return
+    if coordinator is None:
+        coordinator = TrialAgentCoordinator(project_client, chat_client)
+    if "pipeline" not in _tasks or _tasks["pipeline"].done():
+        _tasks["pipeline"] = asyncio.create_task(_warm_up_and_consume())
+        logger.info("🚀 Warming up trial agents")
+
+async def stop_trial_pipeline() -> None:
+    """Stop the consumer and any pending warm-up."""
+    for task in _tasks.values():
+        task.cancel()
+    for task in _tasks.values():
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    _tasks.clear()
+    if consumer:
+        await consumer.close()
+
+def pipeline_metrics() -> Dict[str, Any]:
+    """Return the coordinator's processing counters."""
+    if not coordinator:
+        return {}
+    return {
+        **coordinator.stats,
+        "summary_batches": dict(coordinator.summary_batcher.stats),
+        "analysis_cache": coordinator.analysis_cache.stats(),
+        "consumer": dict(consumer.stats) if consumer else {},
+    }
+
+def pipeline_status() -> Dict[str, Any]:
+    """Report whether the trial agents are warm and the consumer is running."""
+    if not TRIAL_AGENTS_ENABLED:
+        return {"enabled": False, "ready": True}
+    task = _tasks.get("pipeline")
+    return {
+        "enabled": True,
+        "ready": bool(coordinator and coordinator.is_ready),
+        "agents": coordinator.readiness() if coordinator else {},
+        "consumer_running": bool(consumer and task and not task.done()),
+        "error": _warmup_error,
+    }
@@ -0,0 +1,134 @@
+"""
+Rule-based Trial Event Triage
+
+Scores each trial event against configurable clinical thresholds before any
+agent is involved. Events whose vitals are all within range and which report no
+adverse events receive a templated analysis locally; only abnormal or adverse
+events are escalated to the multi-agent system.
+
+Thresholds can be overridden with the TRIAGE_THRESHOLDS environment variable,
+a JSON object using the keys of DEFAULT_THRESHOLDS, e.g.
+    TRIAGE_THRESHOLDS='{"heart_rate": [50, 110], "oxygen_saturation_min": 92}'
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Inclusive normal ranges for adult vital signs
+DEFAULT_THRESHOLDS: Dict[str, Any] = {
+    "heart_rate": (60, 100),             # beats per minute
+    "systolic": (90, 140),               # mmHg
+    "diastolic": (60, 90),               # mmHg
+    "oxygen_saturation_min": 95,         # percent
+    "temperature": (36.0, 37.5),         # degrees Celsius
+    "respiratory_rate": (12, 20),        # breaths per minute
+}
+
+# Score contributed by each adverse event severity
+SEVERITY_SCORES = {"mild": 1, "moderate": 2, "severe": 3}
+
+class TriageResult:
+    """Outcome of triaging a single trial event."""
+
+    def __init__(self, score: int, findings: List[str], vitals_abnormal: bool, has_adverse_events: bool):
+        self.score = score
+        self.findings = findings
+        self.vitals_abnormal = vitals_abnormal
+        self.has_adverse_events = has_adverse_events
+
+    @property
+    def escalate(self) -> bool:
+        """Whether the event needs analysis by the agents."""
+        return self.vitals_abnormal or self.has_adverse_events
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "escalated": self.escalate,
+            "score": self.score,
+            "findings": self.findings,
+        }
+
+def parse_blood_pressure(value: Any) -> Optional[Tuple[int, int]]:
+    """Parse a "systolic/diastolic" reading, returning None if it is malformed."""
+    try:
+        systolic, diastolic = str(value).split("/")
+        return int(systolic), int(diastolic)
+    except (TypeError, ValueError):
+        return None
+
+class TrialEventTriage:
+    """Deterministic scoring of trial events against clinical thresholds."""
+
+    def __init__(self, thresholds: Optional[Dict[str, Any]] = None):
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+    @classmethod
+    def from_env(cls) -> "TrialEventTriage":
+        """Create a triage stage using TRIAGE_THRESHOLDS overrides, if any."""
+        overrides = None
+        if raw := os.getenv("TRIAGE_THRESHOLDS"):
+            try:
+                overrides = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logger.error("Invalid TRIAGE_THRESHOLDS, using defaults: %s", str(e))
+        return cls(overrides)
+
+    def assess(self, event: Dict[str, Any]) -> TriageResult:
+        """Score an event; missing or unparseable vitals count as abnormal."""
+        findings = []
+        score = 0
+        vitals = event.get("vitals")
+        if not isinstance(vitals, dict):
+            findings.append("vitals missing")
+            score += 1
+        else:
+            blood_pressure = parse_blood_pressure(vitals.get("bloodPressure"))
+            checks = [
+                ("heart rate", vitals.get("heartRate"), self.thresholds["heart_rate"]),
+                ("systolic pressure", blood_pressure[0] if blood_pressure else None, self.thresholds["systolic"]),
+                ("diastolic pressure", blood_pressure[1] if blood_pressure else None, self.thresholds["diastolic"]),
+                ("oxygen saturation", vitals.get("oxygenSaturation"), (self.thresholds["oxygen_saturation_min"], None)),
+                ("temperature", vitals.get("temperature"), self.thresholds["temperature"]),
+                ("respiratory rate", vitals.get("respiratoryRate"), self.thresholds["respiratory_rate"]),
+            ]
+            for label, value, (low, high) in checks:
+                if not isinstance(value, (int, float)):
+                    findings.append(f"{label} unavailable")
+                    score += 1
+                elif low is not None and value < low:
+                    findings.append(f"{label} low ({value})")
+                    score += 1
+                elif high is not None and value > high:
+                    findings.append(f"{label} high ({value})")
+                    score += 1
+        vitals_abnormal = bool(findings)
+
+        adverse_events = event.get("adverseEvents") or []
+        for adverse_event in adverse_events:
+            severity = str(adverse_event.get("type", "")).lower()
+            score += SEVERITY_SCORES.get(severity, 1)
+            findings.append(f"{severity or 'unclassified'} adverse event: {adverse_event.get('description') or 'unspecified'}")
+
+        return TriageResult(score, findings, vitals_abnormal, bool(adverse_events))
+
+def templated_analysis(event: Dict[str, Any], triage: TriageResult) -> Dict[str, Any]:
+    """Build the analysis for a routine event without calling any agent."""
+    return {
+        "event_id": event.get("id"),
+        "timestamp": event.get("timestamp"),
+        "analysis": {
+            "summary": {
+                "response": (
+                    f"Routine event for patient {event.get('patientId')} in {event.get('studyArm')}: "
+                    "all vital signs within normal ranges and no adverse events reported."
+                ),
+                "agent_type": "RuleBasedTriage",
+            }
+        },
+        "recommendations": [],
+        "triage": triage.as_dict(),
+    }
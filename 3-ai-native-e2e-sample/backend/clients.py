@@ -1,9 +1,16 @@
 # This module initializes and validates the Azure AI clients.
 # These clients are critical for communication with the AI agents used in the trial event analysis flow.
+# A single client (and credential) is created on application startup and shared by every router
+# through the get_project_client dependency, so requests reuse cached tokens and pooled connections.
+# The async (aio) SDK is used throughout so that agent calls never block the event loop.
+import asyncio
 import os
 import logging
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
+import aiohttp
+from azure.ai.projects.aio import AIProjectClient
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.identity.aio import DefaultAzureCredential
+from fastapi import HTTPException
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
 
@@ -14,69 +21,144 @@ tracer = trace.get_tracer(__name__)
 
 project_client = None
 chat_client = None
+credential = None
+http_session = None
+# Serializes (re-)initialization so concurrent requests never create clients in parallel
+_init_lock = None
+
+# Size of the shared HTTP connection pool used by the project client
+POOL_MAXSIZE = int(os.getenv("AZURE_CLIENT_POOL_MAXSIZE", "100"))
 
 def validate_project_client(client) -> bool:
     """Validate project client is properly initialized."""
     if not client:
         logger.error("Project client is None")
         return False
-        
+
     if not hasattr(client, 'agents'):
         logger.error("Project client missing 'agents' attribute")
         logger.error("Client type: %s", type(client))
         logger.error("Available attributes: %s", dir(client))
         return False
-        
+
     return True
 
-def ensure_clients():
-    """Ensure clients are initialized for multi-agent communication."""
-    global project_client, chat_client
-    
+def _create_transport() -> AioHttpTransport:
+    """Create an HTTP transport backed by a shared, pooled aiohttp session."""
+    global http_session
+
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(limit=POOL_MAXSIZE, limit_per_host=POOL_MAXSIZE)
+        http_session = aiohttp.ClientSession(connector=connector)
+        logger.info("🔗 Created shared HTTP session (pool size: %d)", POOL_MAXSIZE)
+    return AioHttpTransport(session=http_session, session_owner=False)
+
+async def ensure_clients():
+    """Ensure clients are initialized for multi-agent communication.
+
+    Concurrent callers wait for a single initialization; callers arriving after
+    it succeeded reuse the clients it created.
+    """
+    global _init_lock
+
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    async with _init_lock:
+        return await _ensure_clients()
+
+async def _ensure_clients():
+    global project_client, chat_client, credential
+
     logger.info("🔌 Initializing Azure AI clients")
-    
+
     try:
         conn_str = os.getenv("PROJECT_CONNECTION_STRING")
         if not conn_str:
             raise ValueError("PROJECT_CONNECTION_STRING environment variable not set")
         logger.debug("Connection string: %s", conn_str)
-        
+
         if not project_client or not validate_project_client(project_client):
             logger.info("Creating new project client")
             try:
+                if credential is None:
+                    credential = DefaultAzureCredential()
                 project_client = AIProjectClient.from_connection_string(
-                    credential=DefaultAzureCredential(),
-                    conn_str=conn_str
+                    credential=credential,
+                    conn_str=conn_str,
+                    transport=_create_transport()
                 )
                 logger.debug("Project client created: %s", project_client)
                 logger.debug("Project client type: %s", type(project_client))
                 logger.debug("Project client attributes: %s", dir(project_client))
-                
+
                 if not validate_project_client(project_client):
                     raise ValueError("Project client validation failed after creation")
-                    
+
                 logger.info("✅ AIProjectClient initialized successfully")
-                
+
                 logger.debug("Getting chat client from project client")
-                chat_client = project_client.inference.get_chat_completions_client()
+                chat_client = await project_client.inference.get_chat_completions_client()
                 logger.info("✅ Chat client initialized successfully")
             except Exception as e:
                 logger.error("Failed to create project client: %s", str(e), exc_info=True)
+                if project_client is not None:
+                    try:
+                        await project_client.close()
+                    except Exception as close_error:
+                        logger.warning("Error closing project client: %s", str(close_error))
                 project_client = None
                 chat_client = None
                 raise
         else:
             logger.debug("Using existing project client: %s", project_client)
-            
+
         if not validate_project_client(project_client):
             raise ValueError("Project client validation failed in final check")
-            
+
         return project_client, chat_client
-        
+
     except Exception as e:
         logger.error("❌ Failed to initialize clients: %s", str(e), exc_info=True)
         logger.error("Project client state: %s", project_client)
         logger.error("Connection string used: %s", os.getenv("PROJECT_CONNECTION_STRING", "Not set"))
         raise
 
-__all__ = ['project_client', 'chat_client', 'tracer', 'ensure_clients']
+async def close_clients() -> None:
+    """Close the shared clients, credential and HTTP session on application shutdown."""
+    global project_client, chat_client, credential, http_session
+
+    logger.info("🛑 Closing Azure AI clients")
+    for resource in (chat_client, project_client, credential, http_session):
+        if resource is None:
+            continue
+        try:
+            await resource.close()
+        except Exception as e:
+            logger.warning("Error closing %s: %s", type(resource).__name__, str(e))
+    project_client = None
+    chat_client = None
+    credential = None
+    http_session = None
+
+async def get_project_client() -> AIProjectClient:
+    """FastAPI dependency returning the shared project client.
+
+    The client is normally created during application startup; if that failed
+    (for example because credentials were not yet available) initialization is
+    retried lazily here.
+
+    Raises:
+        HTTPException: 503 if the client cannot be initialized
+    """
+    if project_client and validate_project_client(project_client):
+        return project_client
+    try:
+        client, _ = await ensure_clients()
+        return client
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Azure AI project client unavailable: {str(e)}"
+        )
+
+__all__ = ['project_client', 'chat_client', 'tracer', 'ensure_clients', 'close_clients', 'get_project_client']
@@ -10,10 +10,18 @@ This application ties together:
 import os
 import logging
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from utils.telemetry import configure_telemetry
-from clients import ensure_clients
+from clients import ensure_clients, close_clients, get_project_client
+from agents.rate_limit import rate_limiter
+from agents.reaper import resource_reaper
+from agents.trials.event_producer.producer import close_producer, event_sender, start_producer
+from agents.trials.pipeline import pipeline_metrics, pipeline_status, start_trial_pipeline, stop_trial_pipeline
+from utils.telemetry import latency_recorder
+from utils.admission import AdmissionRejected
+from utils.resilience import breaker_stats
 from routers import medication, literature, trials  # Add medication import
 
 # -------------------------------
@@ -75,6 +83,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    """Reject requests beyond an endpoint's capacity with 429 and Retry-After."""
+    logger.warning(f"⏳ Rejected request: {exc}")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # -------------------------------
 # Router Registration
 # -------------------------------
@@ -108,10 +126,34 @@ async def startup_event():
     This includes:
       • Validating that the Azure AI clients are set up to enable multi-agent communication.
       • Ensuring all telemetry configurations are in place.
+      • Starting the background reaper that deletes expired agent threads.
+      • Warming up the trial agents concurrently and then starting the event consumer.
+      • Connecting the shared Event Hubs producer used by the simulation endpoints.
     """
     logger.info("📦 Imported dependencies successfully")
+    try:
+        project_client, chat_client = await ensure_clients()
+        start_trial_pipeline(project_client, chat_client)
+    except Exception as e:
+        # Routers retry lazily through the get_project_client dependency
+        logger.error("❌ Azure AI clients unavailable at startup: %s", str(e))
+    try:
+        await start_producer()
+    except Exception as e:
+        # The producer connects lazily on the first simulate call instead
+        logger.warning("⚠️ Event Hubs producer not connected at startup: %s", str(e))
+    resource_reaper.start(get_project_client)
     logger.info("✅ Backend services initialized successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and release the shared Azure AI clients, Event Hubs producer and connection pool."""
+    await stop_trial_pipeline()
+    await close_producer()
+    await resource_reaper.stop()
+    await close_clients()
+    logger.info("👋 Backend services shut down")
+
 # -------------------------------
 # Core Endpoints
 # -------------------------------
@@ -126,6 +168,37 @@ async def health_check():
     """Health check endpoint to verify service status."""
     return {"status": "ok"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint reporting whether the trial agents are warm."""
+    trial_agents = pipeline_status()
+    ready = trial_agents["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "warming", "trial_agents": trial_agents}
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Operational counters for the agent pipeline."""
+    return {
+        "agent_resources": resource_reaper.stats(),
+        "latency": latency_recorder.summary(),
+        "admission": {
+            "medication": medication.medication_admission.stats(),
+            "literature": literature.literature_admission.stats()
+        },
+        "medication_cache": medication.medication_cache_stats(),
+        "rate_limits": rate_limiter.stats(),
+        "circuit_breakers": breaker_stats(),
+        "event_hubs_partitions": event_sender.stats,
+        "single_flight": {
+            "medication": medication.medication_flights.stats(),
+            "literature": literature.literature_flights.stats()
+        },
+        "trial_agents": pipeline_metrics()
+    }
+
 # -------------------------------
 # Development Configuration
 # -------------------------------
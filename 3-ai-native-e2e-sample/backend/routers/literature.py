@@ -1,23 +1,156 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from azure.ai.projects import AIProjectClient
+from starlette.background import BackgroundTask
+from azure.ai.projects.aio import AIProjectClient
 from azure.ai.projects.models import AzureAISearchTool, ConnectionType
-from azure.identity import DefaultAzureCredential
 from agents.literature import LiteratureChatHandler
+from agents.rate_limit import estimate_tokens, rate_limiter
+from agents.reaper import ACTIVE_RUN_STATUSES, ResourceReaper, get_resource_reaper
+from agents.registry import AgentDefinition, AgentRegistry, get_agent_registry
+from clients import get_project_client
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.streaming import DisconnectWatcher, SingleFlight, encode_stream
+from typing import Any, AsyncGenerator, Dict
 import os
 import logging
-import json
+import re
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+LITERATURE_INSTRUCTIONS = """You are a Literature Research Assistant. Help users find and understand scientific literature.
+            Use the search tool to find relevant papers and provide evidence-based responses.
+            Always cite your sources and provide context for your answers."""
+
+# Chats started at once (further requests queue, then get 429 with Retry-After)
+literature_admission = AdmissionController(
+    "literature",
+    max_concurrent=int(os.getenv("LITERATURE_MAX_CONCURRENT", "16")),
+    max_queue=int(os.getenv("LITERATURE_MAX_QUEUE", "32")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+)
+# Concurrent identical questions share one agent run; slow clients apply
+# backpressure to it through their bounded buffers
+literature_flights = SingleFlight.from_env("literature")
+
+# AI Search tool resolved once from the project's default connection
+_search_tool = None
+
+async def _get_search_tool(project_client: AIProjectClient) -> AzureAISearchTool:
+    """Return the AI Search tool, looking up the default connection on first use."""
+    global _search_tool
+    if _search_tool is None:
+        search_conn = await project_client.connections.get_default(
+            connection_type=ConnectionType.AZURE_AI_SEARCH,
+            include_credentials=True
+        )
+        if not search_conn:
+            raise ValueError("No default Azure AI Search connection found")
+        _search_tool = AzureAISearchTool(
+            index_connection_id=search_conn.id,
+            index_name="literature-index"
+        )
+    return _search_tool
+
+def _normalize_message(message: str) -> str:
+    """Normalize a question so that trivially different copies share one run."""
+    return re.sub(r"\s+", " ", message).strip().lower()
+
+async def _chat_events(
+    message: str,
+    project_client: AIProjectClient,
+    registry: AgentRegistry,
+    reaper: ResourceReaper
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Run a literature chat, yielding event dicts until the run completes."""
+    thread = None
+    reservation = None
+    handler = LiteratureChatHandler()
+    try:
+        try:
+            # Configure AI Search tool
+            ai_search_tool = await _get_search_tool(project_client)
+            
+            # Get (or create once) the chat agent
+            agent = await registry.get_agent(project_client, AgentDefinition(
+                name="literature-chat",
+                model=os.environ["MODEL_DEPLOYMENT_NAME"],
+                instructions=LITERATURE_INSTRUCTIONS,
+                tools=ai_search_tool.definitions,
+                tool_resources=ai_search_tool.resources,
+                headers={"x-ms-enable-preview": "true"}
+            ))
+            logger.info(f"Using agent with ID: {agent.id}")
+            
+            # Create thread and message
+            thread = await project_client.agents.create_thread()
+            reaper.track_thread(thread.id)
+            logger.info(f"Created thread with ID: {thread.id}")
+            
+            message_obj = await project_client.agents.create_message(
+                thread_id=thread.id,
+                role="user",
+                content=message
+            )
+            logger.info(f"Created message with ID: {message_obj.id}")
+            
+            # Wait for model deployment capacity (interactive priority) before starting the run
+            reservation = await rate_limiter.acquire(
+                os.environ["MODEL_DEPLOYMENT_NAME"],
+                estimate_tokens(LITERATURE_INSTRUCTIONS + message)
+            )
+            
+            # Create streaming response
+            stream = await project_client.agents.create_stream(
+                thread_id=thread.id,
+                assistant_id=agent.id,
+                event_handler=handler
+            )
+            async with stream as active_stream:
+                async for event in active_stream:
+                    if not (isinstance(event, tuple) and len(event) == 3):
+                        continue
+                    _, _, response = event
+                    if isinstance(response, dict):
+                        yield response
+                        if response.get("type") == "error":
+                            logger.error(f"Stream error: {response.get('content')}")
+                            break
+        except Exception as e:
+            logger.error(f"Stream error: {str(e)}")
+            yield {
+                "type": "error",
+                "content": str(e)
+            }
+        yield {"done": True}
+    finally:
+        # Stop the run server-side if the stream ended before it did
+        # (every client disconnected, error or generator close)
+        run = handler.run
+        if thread and run and run.status in ACTIVE_RUN_STATUSES:
+            reaper.cancel_run(project_client, thread.id, run.id)
+        # Reconcile the token estimate on every path; without a run it is given back
+        if reservation:
+            reservation.settle(run)
+
 @router.post("/literature-chat")
-async def chat_literature(request: Request):
+async def chat_literature(
+    request: Request,
+    project_client: AIProjectClient = Depends(get_project_client),
+    registry: AgentRegistry = Depends(get_agent_registry),
+    reaper: ResourceReaper = Depends(get_resource_reaper)
+):
     """
     Stream chat responses about literature using AI Search.
     
+    Concurrent requests asking the same question share a single agent run and
+    all receive the same event sequence.
+    
     Args:
         request: The request object containing the user's chat message
+        project_client: Shared AI Project client injected by FastAPI
+        registry: Agent registry used to reuse the literature agent across requests
+        reaper: Resource reaper that deletes the chat thread once it expires
         
     Returns:
         StreamingResponse: Server-sent events stream of chat responses
@@ -31,89 +164,34 @@ async def chat_literature(request: Request):
         if not message:
             raise HTTPException(status_code=400, detail="Message field is required")
 
-        # Initialize AI Project client
-        project_client = AIProjectClient.from_connection_string(
-            credential=DefaultAzureCredential(),
-            conn_str=os.environ["PROJECT_CONNECTION_STRING"]
-        )
-        
-        # Get AI Search connection
-        search_conn = project_client.connections.get_default(
-            connection_type=ConnectionType.AZURE_AI_SEARCH,
-            include_credentials=True
-        )
-        if not search_conn:
-            raise ValueError("No default Azure AI Search connection found")
-        
-        # Configure AI Search tool
-        ai_search_tool = AzureAISearchTool(
-            index_connection_id=search_conn.id,
-            index_name="literature-index"
-        )
-        
-        # Create chat agent
-        agent = project_client.agents.create_agent(
-            model=os.environ["MODEL_DEPLOYMENT_NAME"],
-            name="literature-chat",
-            instructions="""You are a Literature Research Assistant. Help users find and understand scientific literature.
-            Use the search tool to find relevant papers and provide evidence-based responses.
-            Always cite your sources and provide context for your answers.""",
-            tools=ai_search_tool.definitions,
-            tool_resources=ai_search_tool.resources,
-            headers={"x-ms-enable-preview": "true"}
-        )
-        logger.info(f"Created agent with ID: {agent.id}")
-        
-        # Create thread and message
-        thread = project_client.agents.create_thread()
-        logger.info(f"Created thread with ID: {thread.id}")
-        
-        message_obj = project_client.agents.create_message(
-            thread_id=thread.id,
-            role="user",
-            content=message
-        )
-        logger.info(f"Created message with ID: {message_obj.id}")
-        
-        # Create streaming response
-        stream = project_client.agents.create_stream(
-            thread_id=thread.id,
-            assistant_id=agent.id,
-            event_handler=LiteratureChatHandler()
+        watcher = DisconnectWatcher(request)
+        key = _normalize_message(message)
+        # Requests joining an in-flight chat start no new run. A new run's slot is
+        # owned by the flight and held until the run ends, even if this client
+        # leaves while others keep listening.
+        slot = None if key in literature_flights else await literature_admission.acquire()
+        events = literature_flights.stream(
+            key,
+            lambda: _chat_events(message, project_client, registry, reaper),
+            watcher,
+            slot=slot
         )
         
         async def generate_events():
-            try:
-                with stream as active_stream:
-                    for event in active_stream:
-                        if isinstance(event, tuple) and len(event) == 3:
-                            _, _, response = event
-                            if response:
-                                yield f"data: {response}\n\n"
-                                
-                                # Check if this was an error response
-                                try:
-                                    resp_data = json.loads(response)
-                                    if resp_data.get("type") == "error":
-                                        logger.error(f"Stream error: {resp_data.get('content')}")
-                                        break
-                                except:
-                                    pass
-            except Exception as e:
-                logger.error(f"Stream error: {str(e)}")
-                error_msg = json.dumps({
-                    "type": "error",
-                    "content": str(e)
-                })
-                yield f"data: {error_msg}\n\n"
-            finally:
-                yield "data: {\"done\": true}\n\n"
+            async for frame in encode_stream(events):
+                yield frame
+            if watcher.disconnected:
+                logger.info("Client disconnected from literature chat")
         
+        # The background task unsubscribes if the stream never started
         return StreamingResponse(
             generate_events(),
-            media_type="text/event-stream"
+            media_type="text/event-stream",
+            background=BackgroundTask(events.aclose)
         )
         
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         logger.error(f"Error in literature chat: {str(e)}")
         raise HTTPException(
@@ -1,161 +1,489 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import BingGroundingTool, FunctionTool, SubmitToolOutputsAction, RequiredFunctionToolCall, ToolOutput
-from azure.identity import DefaultAzureCredential
+from starlette.background import BackgroundTask
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.projects.models import (
+    BingGroundingTool, FunctionTool, ListSortOrder, ResponseFormatJsonSchema, ResponseFormatJsonSchemaType
+)
+from agents.medication import MedicationAnalysisHandler, message_text, poll_run
 from agents.medication_functions import medication_functions
+from agents.rate_limit import estimate_tokens, rate_limiter
+from agents.reaper import ACTIVE_RUN_STATUSES, ResourceReaper, get_resource_reaper
+from agents.registry import AgentDefinition, AgentRegistry, get_agent_registry
+from clients import get_project_client
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.cache import ResponseCache
+from utils.resilience import RetryPolicy, call_with_retry, get_breaker, is_rejected_request
+from utils.streaming import DisconnectWatcher, SingleFlight, encode_event, encode_stream
+from utils.telemetry import latency_recorder
 import os
 import logging
-import json
 import time
 import asyncio
-from pydantic import BaseModel
-from typing import Optional
+import hashlib
+import re
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/agents", tags=["medication"])
 
+# Drive runs through the streaming API (set to false to always poll)
+MEDICATION_STREAMING = os.getenv("MEDICATION_STREAMING", "true").lower() == "true"
+# Constrain answers to the MedicationAnalysis JSON schema (set to false for models without support)
+MEDICATION_STRUCTURED_OUTPUT = os.getenv("MEDICATION_STRUCTURED_OUTPUT", "true").lower() == "true"
+# Maximum time a single analysis run may take
+MEDICATION_RUN_TIMEOUT = float(os.getenv("MEDICATION_RUN_TIMEOUT_SECONDS", "60"))
+# Batch requests: maximum medications per request and analyses run at once per request
+MEDICATION_BATCH_MAX_SIZE = int(os.getenv("MEDICATION_BATCH_MAX_SIZE", "20"))
+MEDICATION_BATCH_CONCURRENCY = int(os.getenv("MEDICATION_BATCH_CONCURRENCY", "4"))
+
+# Completed analyses are served from cache: fresh for MEDICATION_CACHE_TTL_SECONDS, then
+# served stale for up to MEDICATION_CACHE_MAX_STALE_SECONDS while refreshed in the background.
+# Set MEDICATION_CACHE_PATH to a SQLite file to persist them across restarts and workers.
+medication_cache = ResponseCache(
+    ttl_seconds=float(os.getenv("MEDICATION_CACHE_TTL_SECONDS", "3600")),
+    max_stale_seconds=float(os.getenv("MEDICATION_CACHE_MAX_STALE_SECONDS", "86400")),
+    max_size=int(os.getenv("MEDICATION_CACHE_MAX_SIZE", "512")),
+    sqlite_path=os.getenv("MEDICATION_CACHE_PATH") or None,
+    namespace="medication"
+)
+# Analyses started at once (further requests queue, then get 429 with Retry-After)
+medication_admission = AdmissionController(
+    "medication",
+    max_concurrent=int(os.getenv("MEDICATION_MAX_CONCURRENT", "16")),
+    max_queue=int(os.getenv("MEDICATION_MAX_QUEUE", "32")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+)
+# Creating a run is not idempotent: only retry failures where the request certainly
+# had no effect, never timeouts, which could leave a second run on the thread
+CREATE_RUN_RETRY_POLICY = RetryPolicy.from_env(retry_on=is_rejected_request)
+# Concurrent requests for the same analysis share one agent run
+medication_flights = SingleFlight.from_env("medication")
+# Cache keys with a background refresh in progress, and the refresh tasks themselves
+_refreshing: Set[str] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
 class MedicationInfo(BaseModel):
     name: str
     notes: Optional[str] = None
 
+class MedicationBatch(BaseModel):
+    medications: List[MedicationInfo]
+
 class MedicationAnalysis(BaseModel):
     analysis: str
     interactions: list[str]
     warnings: list[str]
     recommendations: list[str]
 
-@router.post("/medication/analyze_stream")
-async def analyze_medication_stream(info: MedicationInfo):
-    async def event_generator():
-        try:
-            # Initialize client
-            project_client = AIProjectClient.from_connection_string(
-                credential=DefaultAzureCredential(),
-                conn_str=os.environ["PROJECT_CONNECTION_STRING"]
-            )
-            logger.info(f"Starting streaming medication analysis for: {info.name}")
-            
-            # Get Bing connection and set up the tool
-            bing_conn = project_client.connections.get(connection_name=os.environ["BING_CONNECTION_NAME"])
-            if not bing_conn:
-                yield f"data: {json.dumps({'type': 'error', 'content': 'No Bing connection found.'})}\n\n"
-                return
-            bing_tool = BingGroundingTool(connection_id=bing_conn.id)
-            
-            # Update system prompt with the new instructions:
-            # The assistant must use Bing to search for medication data,
-            # then call the analyze_medication_info function to format the response.
-            system_prompt = (
-                "You are a medication analysis assistant. Use Bing to retrieve accurate, up-to-date "
-                "information about the medication specified by the user. Once you obtain Bing's results, "
-                "call the analyze_medication_info function to structure your response as a JSON string. "
-                "Return only a valid JSON string without any markdown or additional text."
-            )
-            
-            # Configure function tools
-            functions = FunctionTool(functions=medication_functions)
-            
-            # Create agent with both Bing and function tools
-            agent = project_client.agents.create_agent(
-                model=os.environ["MODEL_DEPLOYMENT_NAME"],
-                name="medication-analysis-stream",
-                instructions=system_prompt,
-                tools=[*bing_tool.definitions, *functions.definitions],
-                headers={"x-ms-enable-preview": "true"}
-            )
-            logger.info(f"Created agent with ID: {agent.id}")
-            yield f"data: {json.dumps({'type': 'message', 'content': 'Agent created. Starting thread...'})}\n\n"
-            
-            # Create thread and initial message
-            thread = project_client.agents.create_thread()
-            message_content = f"Analyze the medication: {info.name}. {info.notes if info.notes else ''}"
-            project_client.agents.create_message(
-                thread_id=thread.id,
-                role="user",
-                content=message_content
+# JSON schema of MedicationAnalysis used as the agent's response format. The
+# field order is the generation order: 'analysis' streams to the client first.
+MEDICATION_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "interactions": {"type": "array", "items": {"type": "string"}},
+        "warnings": {"type": "array", "items": {"type": "string"}},
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["analysis", "interactions", "warnings", "recommendations"],
+    "additionalProperties": False,
+}
+
+MEDICATION_RESPONSE_FORMAT = ResponseFormatJsonSchemaType(
+    json_schema=ResponseFormatJsonSchema(
+        name="medication_analysis",
+        description="Structured analysis of a medication",
+        schema=MEDICATION_ANALYSIS_SCHEMA
+    )
+)
+
+def parse_analysis(text: Optional[str]) -> Optional[MedicationAnalysis]:
+    """Validate an assistant answer against MedicationAnalysis in one step."""
+    if not text:
+        return None
+    text = text.strip()
+    # Without structured output the model may still wrap its JSON in a markdown fence
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        return MedicationAnalysis.model_validate_json(text)
+    except ValidationError as e:
+        logger.error(f"Invalid medication analysis: {e}")
+        return None
+
+# The assistant must use Bing to search for medication data,
+# then call the analyze_medication_info function to format the response.
+# With structured output the response schema alone controls the answer's format
+MEDICATION_SYSTEM_PROMPT = (
+    "You are a medication analysis assistant. Use Bing to retrieve accurate, up-to-date "
+    "information about the medication specified by the user. Once you obtain Bing's results, "
+    "call the analyze_medication_info function to structure your response as a JSON string."
+    + ("" if MEDICATION_STRUCTURED_OUTPUT else
+       " Return only a valid JSON string without any markdown or additional text.")
+)
+
+# Bing grounding tool resolved once from the configured connection
+_bing_tool = None
+
+async def _get_bing_tool(project_client: AIProjectClient) -> Optional[BingGroundingTool]:
+    """Return the Bing grounding tool, looking up the connection on first use."""
+    global _bing_tool
+    if _bing_tool is None:
+        bing_conn = await project_client.connections.get(connection_name=os.environ["BING_CONNECTION_NAME"])
+        if not bing_conn:
+            return None
+        _bing_tool = BingGroundingTool(connection_id=bing_conn.id)
+    return _bing_tool
+
+async def _run_analysis(
+    info: MedicationInfo,
+    project_client: AIProjectClient,
+    registry: AgentRegistry,
+    reaper: ResourceReaper,
+    watcher: Optional[DisconnectWatcher] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Run a medication analysis, yielding SSE event payloads.
+
+    The last event is either {'type': 'final', ...} with the parsed analysis or
+    {'type': 'error', ...}. Without a watcher (e.g. background refreshes) the
+    run is never abandoned for a disconnected client.
+    """
+    thread = None
+    run = None
+    handler = None
+    reservation = None
+    try:
+        logger.info(f"Starting streaming medication analysis for: {info.name}")
+        
+        # Get Bing connection and set up the tool
+        bing_tool = await _get_bing_tool(project_client)
+        if not bing_tool:
+            yield {'type': 'error', 'content': 'No Bing connection found.'}
+            return
+        
+        # Configure function tools
+        functions = FunctionTool(functions=medication_functions)
+        
+        # Get (or create once) the agent with both Bing and function tools
+        agent = await registry.get_agent(project_client, AgentDefinition(
+            name="medication-analysis-stream",
+            model=os.environ["MODEL_DEPLOYMENT_NAME"],
+            instructions=MEDICATION_SYSTEM_PROMPT,
+            tools=[*bing_tool.definitions, *functions.definitions],
+            headers={"x-ms-enable-preview": "true"},
+            **({"response_format": MEDICATION_RESPONSE_FORMAT} if MEDICATION_STRUCTURED_OUTPUT else {})
+        ))
+        logger.info(f"Using agent with ID: {agent.id}")
+        yield {'type': 'message', 'content': 'Agent ready. Starting thread...'}
+        
+        # Create thread and initial message
+        thread = await project_client.agents.create_thread()
+        reaper.track_thread(thread.id)
+        message_content = f"Analyze the medication: {info.name}. {info.notes if info.notes else ''}"
+        await project_client.agents.create_message(
+            thread_id=thread.id,
+            role="user",
+            content=message_content
+        )
+        yield {'type': 'message', 'content': 'Thread created and message sent.'}
+        
+        # Wait for model deployment capacity (interactive priority) before starting the run
+        reservation = await rate_limiter.acquire(
+            os.environ["MODEL_DEPLOYMENT_NAME"],
+            estimate_tokens(MEDICATION_SYSTEM_PROMPT + message_content)
+        )
+        
+        # Drive the run over the streaming API, falling back to adaptive polling
+        started_at = time.perf_counter()
+        handler = MedicationAnalysisHandler(project_client, functions)
+        timed_out = False
+        if MEDICATION_STREAMING:
+            try:
+                stream = await project_client.agents.create_stream(
+                    thread_id=thread.id,
+                    assistant_id=agent.id,
+                    event_handler=handler
+                )
+                yield {'type': 'message', 'content': 'Run initiated. Processing...'}
+                async with stream as active_stream:
+                    # The deadline also bounds the wait for the next stream event, so a
+                    # stalled stream times out like a stalled poll does
+                    stream_events = active_stream.__aiter__()
+                    while True:
+                        remaining = MEDICATION_RUN_TIMEOUT - (time.perf_counter() - started_at)
+                        try:
+                            _, _, events = await asyncio.wait_for(stream_events.__anext__(), timeout=max(remaining, 0))
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            timed_out = True
+                            break
+                        if handler.run and run is None:
+                            run = handler.run
+                            reaper.track_run(thread.id, run.id)
+                            logger.info(f"Created run with ID: {run.id}")
+                        for event in events or []:
+                            yield event
+                        if watcher and await watcher.is_disconnected():
+                            logger.info(f"Client disconnected from medication analysis of {info.name}")
+                            return
+                run = handler.run
+            except Exception as e:
+                logger.warning(f"Streaming run failed, falling back to polling: {e}")
+                run = handler.run
+
+        if timed_out:
+            yield {'type': 'error', 'content': 'Run timed out.'}
+            return
+
+        if run is None:
+            run = await call_with_retry(
+                lambda: project_client.agents.create_run(thread_id=thread.id, assistant_id=agent.id),
+                CREATE_RUN_RETRY_POLICY,
+                breaker=get_breaker("agents"),
+                name="create_run"
             )
-            yield f"data: {json.dumps({'type': 'message', 'content': 'Thread created and message sent.'})}\n\n"
-            
-            # Create and start the run
-            run = project_client.agents.create_run(thread_id=thread.id, assistant_id=agent.id)
+            reaper.track_run(thread.id, run.id)
             logger.info(f"Created run with ID: {run.id}")
-            yield f"data: {json.dumps({'type': 'message', 'content': 'Run initiated. Processing...'})}\n\n"
-            
-            # Poll for run completion
-            max_retries = 60
-            retry_count = 0
-            while run.status in ["queued", "in_progress", "requires_action"]:
-                await asyncio.sleep(1)
-                run = project_client.agents.get_run(thread_id=thread.id, run_id=run.id)
-                logger.info(f"Current run status: {run.status}")
-                yield f"data: {json.dumps({'type': 'message', 'content': f'Run status: {run.status}'})}\n\n"
-                retry_count += 1
-                if retry_count >= max_retries:
-                    yield f"data: {json.dumps({'type': 'error', 'content': 'Run timed out.'})}\n\n"
+            yield {'type': 'message', 'content': 'Run initiated. Processing...'}
+
+        if run.status in ACTIVE_RUN_STATUSES:
+            remaining = MEDICATION_RUN_TIMEOUT - (time.perf_counter() - started_at)
+            async for event in poll_run(project_client, run, functions, timeout=max(remaining, 0)):
+                if event['type'] == 'run':
+                    run = event['run']
+                    continue
+                if handler.first_status_at is None:
+                    handler.first_status_at = time.perf_counter()
+                yield event
+                if event['type'] == 'error':
                     return
-                # Handle required function calls if any
-                if run.status == "requires_action" and hasattr(run, "required_action") and isinstance(run.required_action, SubmitToolOutputsAction):
-                    tool_calls = run.required_action.submit_tool_outputs.tool_calls
-                    if not tool_calls:
-                        logger.error("No tool calls provided")
-                        break
-                    tool_outputs = []
-                    for tool_call in tool_calls:
-                        if isinstance(tool_call, RequiredFunctionToolCall):
-                            try:
-                                output = functions.execute(tool_call)
-                                tool_outputs.append(
-                                    ToolOutput(
-                                        tool_call_id=tool_call.id,
-                                        output=output
-                                    )
-                                )
-                                yield f"data: {json.dumps({'type': 'message', 'content': f'Executed function call: {tool_call.function.name}'})}\n\n"
-                            except Exception as e:
-                                logger.error(f"Error executing tool call: {e}")
-                    if tool_outputs:
-                        run = project_client.agents.submit_tool_outputs_to_run(
-                            thread_id=thread.id,
-                            run_id=run.id,
-                            tool_outputs=tool_outputs
-                        )
-                        continue
-            
-            # Once the run is complete, look for the assistant message
-            if run.status == "failed":
-                logger.error(f"Run failed: {run.last_error}")
-                yield f"data: {json.dumps({'type': 'error', 'content': f'Run failed: {run.last_error}'})}\n\n"
-                return
+                if watcher and await watcher.is_disconnected():
+                    logger.info(f"Client disconnected from medication analysis of {info.name}")
+                    return
+
+        if handler.first_status_at is not None:
+            latency_recorder.record("medication.time_to_first_status", handler.first_status_at - started_at)
+        
+        # Once the run is complete, look for the assistant message
+        if run.status == "failed":
+            logger.error(f"Run failed: {run.last_error}")
+            yield {'type': 'error', 'content': f'Run failed: {run.last_error}'}
+            return
 
-            messages = project_client.agents.list_messages(thread_id=thread.id)
-            final_result = None
-            for msg in reversed(messages.data):
-                if msg.role == "assistant":
-                    # Loop through message content parts
-                    for content in msg.content:
-                        if hasattr(content, 'text') and content.text:
-                            text = content.text.value
-                            # If the response is formatted with markdown, extract JSON
-                            if text.startswith('```json'):
-                                text = text.split('```json')[1].split('```')[0].strip()
-                            try:
-                                final_result = json.loads(text)
-                                break
-                            except json.JSONDecodeError as e:
-                                logger.error(f"JSON decode error: {e}")
-                    if final_result:
-                        break
-
-            if final_result is None:
-                yield f"data: {json.dumps({'type': 'error', 'content': 'No valid response received from AI'})}\n\n"
+        # The answer is the run's last assistant message: taken from the stream when
+        # available, otherwise fetched on its own instead of listing the whole thread
+        message = handler.completed_message
+        if message is None:
+            messages = await project_client.agents.list_messages(
+                thread_id=thread.id, run_id=run.id, order=ListSortOrder.DESCENDING, limit=1
+            )
+            message = messages.data[0] if messages.data else None
+        analysis = parse_analysis(message_text(message))
+        if analysis is None:
+            yield {'type': 'error', 'content': 'No valid response received from AI'}
+            return
+        final_result = analysis.model_dump()
+
+        # Fields not streamed incrementally (e.g. when polling) are emitted now
+        for field, value in final_result.items():
+            if field not in handler.emitted_fields:
+                yield {'type': 'field', 'field': field, 'content': value}
+
+        # Yield final result as a completed message
+        time_to_result = time.perf_counter() - started_at
+        latency_recorder.record("medication.time_to_result", time_to_result)
+        timings = {'time_to_result_ms': round(time_to_result * 1000)}
+        if handler.first_status_at is not None:
+            timings['time_to_first_status_ms'] = round((handler.first_status_at - started_at) * 1000)
+        yield {'done': True, 'type': 'final', 'content': final_result, 'timings': timings}
+        
+    except Exception as ex:
+        logger.error(f"Exception in streaming analysis: {ex}")
+        yield {'type': 'error', 'content': str(ex)}
+    finally:
+        # Cancel the run server-side when the client disconnected, the run
+        # timed out or the generator was closed before the run finished
+        current = run or (handler.run if handler else None)
+        if thread and current and current.status in ACTIVE_RUN_STATUSES:
+            reaper.cancel_run(project_client, thread.id, current.id)
+        # Reconcile the token estimate on every path (errors, timeouts, disconnects)
+        if reservation:
+            reservation.settle(current)
+
+def medication_cache_key(info: MedicationInfo) -> str:
+    """Cache key from the normalized medication name and a hash of the notes."""
+    name = re.sub(r"\s+", " ", info.name).strip().lower()
+    notes = re.sub(r"\s+", " ", info.notes or "").strip()
+    return f"{name}:{hashlib.sha256(notes.encode('utf-8')).hexdigest()[:16]}"
+
+async def _analyze_and_cache(
+    key: str,
+    info: MedicationInfo,
+    project_client: AIProjectClient,
+    registry: AgentRegistry,
+    reaper: ResourceReaper
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Run an analysis, storing its final result in the medication cache."""
+    async for event in _run_analysis(info, project_client, registry, reaper):
+        if event['type'] == 'final':
+            await medication_cache.set(key, event['content'])
+        yield event
+
+async def _refresh(key: str, info: MedicationInfo, project_client: AIProjectClient, registry: AgentRegistry, reaper: ResourceReaper) -> None:
+    """Re-run a stale analysis in the background to update the cache.
+
+    A refresh starting a new run takes an admission slot like any request, so
+    the concurrency cap covers background runs too; when none is available the
+    stale entry is simply served until a later refresh succeeds.
+    """
+    try:
+        slot = None
+        if key not in medication_flights:
+            try:
+                slot = await medication_admission.acquire()
+            except AdmissionRejected as e:
+                logger.info(f"Skipping background refresh of {info.name}: {e}")
                 return
+        async for event in medication_flights.stream(
+            key, lambda: _analyze_and_cache(key, info, project_client, registry, reaper), slot=slot
+        ):
+            if event['type'] == 'error':
+                logger.warning(f"Background refresh of {info.name} failed: {event['content']}")
+    finally:
+        _refreshing.discard(key)
+
+def _schedule_refresh(key: str, info: MedicationInfo, project_client: AIProjectClient, registry: AgentRegistry, reaper: ResourceReaper) -> None:
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.create_task(_refresh(key, info, project_client, registry, reaper))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+def medication_cache_stats() -> Dict[str, Any]:
+    return {**medication_cache.stats(), "refreshing": len(_refreshing)}
+
+@router.post("/medication/analyze_stream")
+async def analyze_medication_stream(
+    info: MedicationInfo,
+    request: Request,
+    project_client: AIProjectClient = Depends(get_project_client),
+    registry: AgentRegistry = Depends(get_agent_registry),
+    reaper: ResourceReaper = Depends(get_resource_reaper)
+):
+    key = medication_cache_key(info)
+    cached = await medication_cache.get(key)
+    watcher = DisconnectWatcher(request)
+    events = None
+    if cached is None:
+        # Requests joining an in-flight analysis start no new run. A new run's slot
+        # is owned by the flight and held until the run ends, even if this client
+        # leaves while others keep listening.
+        slot = None if key in medication_flights else await medication_admission.acquire()
+        # The shared run is not tied to one client; each subscriber watches its own
+        events = medication_flights.stream(
+            key, lambda: _analyze_and_cache(key, info, project_client, registry, reaper), watcher, slot=slot
+        )
 
-            # Yield final result as a completed message
-            yield f"data: {json.dumps({'done': True, 'type': 'final', 'content': final_result})}\n\n"
-            
-        except Exception as ex:
-            logger.error(f"Exception in streaming analysis: {ex}")
-            yield f"data: {json.dumps({'type': 'error', 'content': str(ex)})}\n\n"
+    async def event_generator():
+        if cached is not None:
+            result, is_stale = cached
+            if is_stale:
+                _schedule_refresh(key, info, project_client, registry, reaper)
+            yield encode_event({'done': True, 'type': 'final', 'content': result, 'cached': True, 'stale': is_stale})
+            return
+        async for frame in encode_stream(events):
+            yield frame
+    
+    # The background task unsubscribes if the stream never started
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        background=BackgroundTask(events.aclose) if events else None
+    )
+
+async def _analyze_batch_item(
+    info: MedicationInfo,
+    project_client: AIProjectClient,
+    registry: AgentRegistry,
+    reaper: ResourceReaper,
+    watcher: DisconnectWatcher
+) -> Dict[str, Any]:
+    """Analyze one medication of a batch, returning its result (or error) event."""
+    key = medication_cache_key(info)
+    cached = await medication_cache.get(key)
+    if cached is not None:
+        result, is_stale = cached
+        if is_stale:
+            _schedule_refresh(key, info, project_client, registry, reaper)
+        return {'type': 'result', 'medication': info.name, 'content': result, 'cached': True, 'stale': is_stale}
+
+    slot = None
+    if key not in medication_flights:
+        try:
+            slot = await medication_admission.acquire()
+        except AdmissionRejected as e:
+            return {'type': 'error', 'medication': info.name, 'content': str(e), 'retry_after': e.retry_after}
+    events = medication_flights.stream(
+        key, lambda: _analyze_and_cache(key, info, project_client, registry, reaper), watcher, slot=slot
+    )
+    try:
+        async for event in events:
+            if event['type'] == 'final':
+                return {'type': 'result', 'medication': info.name, 'content': event['content'], 'timings': event.get('timings')}
+            if event['type'] == 'error':
+                return {'type': 'error', 'medication': info.name, 'content': event['content']}
+        return {'type': 'error', 'medication': info.name, 'content': 'Analysis ended without a result'}
+    finally:
+        await events.aclose()
+
+@router.post("/medication/analyze_batch_stream")
+async def analyze_medication_batch_stream(
+    batch: MedicationBatch,
+    request: Request,
+    project_client: AIProjectClient = Depends(get_project_client),
+    registry: AgentRegistry = Depends(get_agent_registry),
+    reaper: ResourceReaper = Depends(get_resource_reaper)
+):
+    """
+    Analyze a list of medications concurrently, streaming each result as it completes.
     
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    Up to MEDICATION_BATCH_CONCURRENCY analyses run at once and all of them use the
+    same registry-managed agent. Every result event is tagged with its medication
+    name; results arrive in completion order, not request order.
+    """
+    if not batch.medications:
+        raise HTTPException(status_code=400, detail="At least one medication is required")
+    if len(batch.medications) > MEDICATION_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MEDICATION_BATCH_MAX_SIZE} medications per batch")
+    watcher = DisconnectWatcher(request)
+
+    async def batch_events():
+        semaphore = asyncio.Semaphore(MEDICATION_BATCH_CONCURRENCY)
+
+        async def analyze(info: MedicationInfo) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await _analyze_batch_item(info, project_client, registry, reaper, watcher)
+                except Exception as e:
+                    logger.error(f"Batch analysis of {info.name} failed: {e}")
+                    return {'type': 'error', 'medication': info.name, 'content': str(e)}
+
+        tasks = [asyncio.create_task(analyze(info)) for info in batch.medications]
+        counts = {'result': 0, 'error': 0}
+        try:
+            yield {'type': 'message', 'content': f'Analyzing {len(tasks)} medications...'}
+            for completed in asyncio.as_completed(tasks):
+                event = await completed
+                counts[event['type']] += 1
+                yield event
+            yield {'done': True, 'type': 'done', 'completed': counts['result'], 'failed': counts['error']}
+        finally:
+            # Stop the remaining analyses when the client disconnects
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(encode_stream(batch_events()), media_type="text/event-stream")
@@ -1,8 +1,9 @@
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from datetime import datetime
 import logging
 from opentelemetry import trace
-from agents.trials.event_producer.producer import simulate_trial_data
+from agents.trials.event_producer.producer import simulate_bulk_trial_data, simulate_trial_data
 
 # Configure logging and tracing
 logger = logging.getLogger(__name__)
@@ -11,7 +12,7 @@ tracer = trace.get_tracer(__name__)
 router = APIRouter()
 
 @router.post("/simulate")
-async def simulate_trial_events(num_events: int = Query(default=1, ge=1, le=100)):
+async def simulate_trial_events(num_events: int = Query(default=1, ge=1, le=1000)):
     """
     Simulate clinical trial events.
     
@@ -19,7 +20,7 @@ async def simulate_trial_events(num_events: int = Query(default=1, ge=1, le=100)
     and they are subsequently processed by the multi-agent system.
     
     Args:
-        num_events: Number of events to generate (1-100)
+        num_events: Number of events to generate (1-1000)
         
     Returns:
         List of generated trial events and simulation status.
@@ -48,3 +49,45 @@ async def simulate_trial_events(num_events: int = Query(default=1, ge=1, le=100)
                 status_code=500,
                 detail=str(e)
             )
+
+@router.post("/simulate/bulk")
+async def simulate_bulk_trial_events(
+    num_events: int = Query(default=10000, ge=1, le=1000000),
+    seed: Optional[int] = Query(default=None)
+):
+    """
+    Simulate a high volume of clinical trial events for load testing.
+
+    Events are generated in vectorized chunks and published via Event Hubs without
+    being returned in the response.
+
+    Args:
+        num_events: Number of events to generate (1-1000000)
+        seed: Optional seed for a reproducible event stream (timestamps then start at 2024-01-01T00:00:00Z)
+
+    Returns:
+        Counts of the events, batches and partitions published.
+    """
+    with tracer.start_as_current_span("simulate_bulk_trial_events") as span:
+        try:
+            logger.info("🔄 Starting bulk trial event simulation for %d events", num_events)
+            span.set_attribute("trial.num_events", num_events)
+
+            result = await simulate_bulk_trial_data(num_events, seed=seed)
+
+            logger.info("✅ Bulk trial event simulation completed")
+            span.set_attribute("trial.events_generated", result["events_sent"])
+            return {
+                "status": "success",
+                "message": f"Generated and published {result['events_sent']} trial events",
+                **result
+            }
+
+        except Exception as e:
+            logger.error("❌ Error in bulk trial event simulation: %s", str(e), exc_info=True)
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+            span.record_exception(e)
+            raise HTTPException(
+                status_code=500,
+                detail=str(e)
+            )
@@ -0,0 +1,18 @@
+from agents.rate_limit import TokenBucket
+
+def test_request_within_budget_waits_for_refill():
+    bucket = TokenBucket(per_minute=600)
+    bucket.level = 150
+    # 100 tokens plus the 120-token reserve, refilled at 10 tokens per second
+    assert bucket.wait_time(100, reserve=0.2) == 7.0
+
+def test_oversized_background_request_waits_for_its_share_only():
+    bucket = TokenBucket(per_minute=600)
+    # Larger than the whole bucket: it may drain the unreserved share at once
+    assert bucket.wait_time(10_000, reserve=0.2) == 0.0
+    bucket.level = 0
+    # ...and otherwise waits until that share (480 tokens above the reserve) has refilled
+    assert bucket.wait_time(10_000, reserve=0.2) == 60.0
+
+def test_unlimited_bucket_never_waits():
+    assert TokenBucket(per_minute=0).wait_time(10_000, reserve=0.2) == 0.0
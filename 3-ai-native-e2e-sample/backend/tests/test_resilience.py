@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry
+
+def test_breaker_opens_after_threshold_and_admits_one_trial():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=0)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    # reset_seconds has passed: one half-open trial call, the next is refused
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_transient_errors_are_retried_and_others_raised():
+    async def scenario():
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("reset")
+            return "ok"
+
+        async def broken():
+            raise ValueError("bad request")
+
+        policy = RetryPolicy(max_attempts=3, base_delay=0)
+        breaker = CircuitBreaker("test", failure_threshold=5)
+        assert await call_with_retry(flaky, policy, breaker) == "ok"
+        assert len(calls) == 3
+        assert breaker.stats()["consecutive_failures"] == 0
+        with pytest.raises(ValueError):
+            await call_with_retry(broken, policy, breaker)
+        # A permanent error says nothing about the dependency's health
+        assert breaker.stats()["consecutive_failures"] == 0
+    asyncio.run(scenario())
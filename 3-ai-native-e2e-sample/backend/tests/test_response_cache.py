@@ -0,0 +1,35 @@
+import asyncio
+import sqlite3
+import time
+from utils.cache import ResponseCache, TTLCache
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_stale_entry_is_served_and_flagged():
+    async def scenario():
+        cache = ResponseCache(ttl_seconds=10, max_stale_seconds=100)
+        cache._memory.set("key", {"answer": 1}, stored_at=time.time() - 50)
+        assert await cache.get("key") == ({"answer": 1}, True)
+        cache._memory.set("key", {"answer": 1}, stored_at=time.time() - 200)
+        assert await cache.get("key") is None
+    asyncio.run(scenario())
+
+def test_entries_survive_restart_and_corrupt_rows_are_misses(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "cache.sqlite3")
+        await ResponseCache(sqlite_path=path).set("key", {"answer": 1})
+        assert await ResponseCache(sqlite_path=path).get("key") == ({"answer": 1}, False)
+        with sqlite3.connect(path) as connection:
+            connection.execute("UPDATE responses SET value = 'not json'")
+        cache = ResponseCache(sqlite_path=path)
+        assert await cache.get("key") is None
+        assert cache.stats()["disk_errors"] == 1
+    asyncio.run(scenario())
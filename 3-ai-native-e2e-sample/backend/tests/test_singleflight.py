@@ -0,0 +1,102 @@
+import asyncio
+from utils.streaming.singleflight import DROPPED_EVENT, SingleFlight
+
+class Producer:
+    """Counts produced events and records when the producer is closed."""
+
+    def __init__(self, count, block_after=None):
+        self.count = count
+        self.block_after = block_after
+        self.produced = 0
+        self.closed = False
+
+    async def events(self):
+        try:
+            for i in range(self.count):
+                if i == self.block_after:
+                    await asyncio.Event().wait()
+                self.produced += 1
+                yield i
+                await asyncio.sleep(0)
+        finally:
+            self.closed = True
+
+class Slot:
+    def __init__(self):
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+def test_slow_subscriber_holds_back_producer():
+    async def scenario():
+        producer = Producer(100)
+        flights = SingleFlight("test", max_lag=3, lag_timeout=5)
+        subscription = flights.stream("key", producer.events)
+        assert await subscription.__anext__() == 0
+        await asyncio.sleep(0.05)
+        # At most one buffer (plus the event being delivered) ahead of the reader
+        assert producer.produced <= 5
+        rest = [event async for event in subscription]
+        assert rest == list(range(1, 100))
+    asyncio.run(scenario())
+
+def test_stalled_subscriber_is_dropped_with_error_event():
+    async def scenario():
+        producer = Producer(50)
+        flights = SingleFlight("test", max_lag=3, lag_timeout=0.05)
+        stalled = flights.stream("key", producer.events)
+        fast = flights.stream("key", producer.events)
+        received = [event async for event in fast]
+        assert received == list(range(50))
+        stalled_events = [event async for event in stalled]
+        assert stalled_events[-1] == DROPPED_EVENT
+        assert len(stalled_events) <= 4
+        assert flights.stats()["dropped"] == 1
+    asyncio.run(scenario())
+
+def test_producer_cancelled_only_when_last_subscriber_leaves():
+    async def scenario():
+        producer = Producer(10, block_after=1)
+        flights = SingleFlight("test")
+        first = flights.stream("key", producer.events)
+        second = flights.stream("key", producer.events)
+        assert await first.__anext__() == 0
+        assert await second.__anext__() == 0
+        await first.aclose()
+        await asyncio.sleep(0.01)
+        assert not producer.closed
+        assert "key" in flights
+        await second.aclose()
+        await asyncio.sleep(0.01)
+        assert producer.closed
+        assert "key" not in flights
+        assert flights.stats()["cancelled"] == 1
+    asyncio.run(scenario())
+
+def test_unread_subscription_closed_before_start_cancels_flight():
+    async def scenario():
+        producer = Producer(10, block_after=1)
+        flights = SingleFlight("test")
+        subscription = flights.stream("key", producer.events)
+        await subscription.aclose()
+        await asyncio.sleep(0.01)
+        assert "key" not in flights
+    asyncio.run(scenario())
+
+def test_slot_held_for_flight_lifetime_and_released_by_joiners():
+    async def scenario():
+        producer = Producer(10, block_after=1)
+        flights = SingleFlight("test")
+        owner_slot, joiner_slot = Slot(), Slot()
+        owner = flights.stream("key", producer.events, slot=owner_slot)
+        joiner = flights.stream("key", producer.events, slot=joiner_slot)
+        assert joiner_slot.released
+        await owner.aclose()
+        await asyncio.sleep(0.01)
+        # The joiner still listens, so the flight (and its slot) lives on
+        assert not owner_slot.released
+        await joiner.aclose()
+        await asyncio.sleep(0.01)
+        assert owner_slot.released
+    asyncio.run(scenario())
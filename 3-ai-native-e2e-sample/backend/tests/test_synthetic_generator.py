@@ -0,0 +1,35 @@
+import json
+from datetime import datetime, timedelta, timezone
+from agents.trials.event_producer.synthetic import SyntheticTrialGenerator
+
+START = datetime(2024, 1, 1)
+
+def test_same_seed_gives_same_payloads():
+    first = SyntheticTrialGenerator(seed=7, start=START).generate_payloads(100)
+    second = SyntheticTrialGenerator(seed=7, start=START).generate_payloads(100)
+    assert first == second
+    assert first != SyntheticTrialGenerator(seed=8, start=START).generate_payloads(100)
+
+def test_seed_alone_is_reproducible():
+    assert SyntheticTrialGenerator(seed=5).generate_payloads(10) == SyntheticTrialGenerator(seed=5).generate_payloads(10)
+
+def test_aware_start_is_converted_to_utc():
+    start = datetime(2024, 1, 1, 2, 0, tzinfo=timezone(timedelta(hours=2)))
+    event = SyntheticTrialGenerator(seed=1, start=start, interval_ms=0).generate_events(1)[0]
+    assert event["timestamp"] == "2024-01-01T00:00:00.000Z"
+
+def test_payloads_are_valid_trial_events():
+    for key, body in SyntheticTrialGenerator(seed=1, num_patients=10).generate_payloads(500):
+        event = json.loads(body)
+        assert key == event["patientId"]
+        assert event["patientId"] in {"P%03d" % i for i in range(1, 11)}
+        systolic, diastolic = map(int, event["vitals"]["bloodPressure"].split("/"))
+        assert systolic > 0 and diastolic > 0
+        assert 80 <= event["vitals"]["oxygenSaturation"] <= 100
+        assert event["timestamp"].endswith("Z")
+
+def test_adverse_event_rate_and_chunking():
+    generator = SyntheticTrialGenerator(seed=3, adverse_event_rate=0.0)
+    chunks = list(generator.iter_payloads(250, chunk_size=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert all(json.loads(body)["adverseEvents"] == [] for chunk in chunks for _, body in chunk)
@@ -0,0 +1,48 @@
+from agents.trials.triage import TrialEventTriage, parse_blood_pressure, templated_analysis
+
+def make_event(**vitals_overrides):
+    vitals = {
+        "heartRate": 72,
+        "bloodPressure": "120/80",
+        "temperature": 36.8,
+        "respiratoryRate": 16,
+        "oxygenSaturation": 98
+    }
+    vitals.update(vitals_overrides)
+    return {
+        "trialId": "CTO001",
+        "patientId": "P001",
+        "studyArm": "Drug A",
+        "vitals": vitals,
+        "adverseEvents": []
+    }
+
+def test_normal_event_is_not_escalated():
+    result = TrialEventTriage().assess(make_event())
+    assert not result.escalate
+    assert result.score == 0
+    analysis = templated_analysis(make_event(), result)
+    assert analysis["analysis"]["summary"]["agent_type"] == "RuleBasedTriage"
+
+def test_abnormal_vitals_are_escalated():
+    result = TrialEventTriage().assess(make_event(bloodPressure="165/95", oxygenSaturation=91))
+    assert result.escalate
+    assert result.vitals_abnormal
+    assert result.score == 3
+
+def test_adverse_events_are_escalated_with_severity_score():
+    event = make_event()
+    event["adverseEvents"] = [{"type": "Severe", "description": "Dizziness"}]
+    result = TrialEventTriage().assess(event)
+    assert result.escalate
+    assert not result.vitals_abnormal
+    assert result.score == 3
+
+def test_unparseable_vitals_are_escalated():
+    result = TrialEventTriage().assess(make_event(bloodPressure="n/a"))
+    assert result.escalate
+    assert parse_blood_pressure("n/a") is None
+
+def test_threshold_overrides():
+    triage = TrialEventTriage({"heart_rate": [50, 70]})
+    assert triage.assess(make_event()).escalate
@@ -0,0 +1,5 @@
+"""Admission control (concurrency limits and 429 backpressure) for agent endpoints."""
+
+from .controller import AdmissionController, AdmissionRejected, AdmissionSlot
+
+__all__ = ['AdmissionController', 'AdmissionRejected', 'AdmissionSlot']
@@ -0,0 +1,99 @@
+"""
+Admission control for agent-backed endpoints.
+
+Each endpoint gets a fixed number of concurrent agent runs and a bounded queue
+of requests waiting for one. Requests beyond the queue, or that wait longer
+than the queue timeout, are rejected immediately with a Retry-After estimate
+instead of piling onto the model deployment, which keeps the latency of
+admitted requests predictable under overload.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from utils.telemetry import latency_recorder
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; mapped to HTTP 429."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is at capacity, retry after {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class AdmissionSlot:
+    """A held concurrency slot; release() may safely be called more than once."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._acquired_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._acquired_at)
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, max_concurrent: int = 16, max_queue: int = 32, queue_timeout: float = 10.0):
+        """
+        Args:
+            name: Endpoint name used in metrics and rejection messages.
+            max_concurrent: Requests allowed to run at the same time.
+            max_queue: Requests allowed to wait for a slot; further ones are rejected.
+            queue_timeout: Longest time a request waits for a slot before being rejected.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._active = 0
+        self._queued = 0
+        # Recent slot hold times, used to estimate Retry-After
+        self._hold_times: Deque[float] = deque(maxlen=100)
+        self._counts = {"admitted": 0, "rejected": 0, "timed_out": 0}
+
+    async def acquire(self) -> AdmissionSlot:
+        """Wait for a slot, raising AdmissionRejected if the queue is full or the wait times out."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self._semaphore.locked() and self._queued >= self.max_queue:
+            self._counts["rejected"] += 1
+            raise AdmissionRejected(self.name, self.retry_after())
+        self._queued += 1
+        started_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._counts["timed_out"] += 1
+            raise AdmissionRejected(self.name, self.retry_after())
+        finally:
+            self._queued -= 1
+        latency_recorder.record(f"admission.{self.name}.wait", time.monotonic() - started_at)
+        self._active += 1
+        self._counts["admitted"] += 1
+        return AdmissionSlot(self)
+
+    def retry_after(self) -> int:
+        """Estimate, in whole seconds, when a slot is likely to be free."""
+        average_hold = sum(self._hold_times) / len(self._hold_times) if self._hold_times else 1.0
+        return max(1, math.ceil(average_hold * (self._queued + 1) / self.max_concurrent))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counts,
+            "active": self._active,
+            "queued": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+    def _release(self, held_seconds: float) -> None:
+        self._active -= 1
+        self._hold_times.append(held_seconds)
+        self._semaphore.release()
@@ -0,0 +1,6 @@
+"""In-process caching utilities."""
+
+from .response_cache import ResponseCache
+from .ttl_lru import TTLCache
+
+__all__ = ['ResponseCache', 'TTLCache']
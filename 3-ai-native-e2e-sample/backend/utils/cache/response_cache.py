@@ -0,0 +1,125 @@
+"""
+Stale-while-revalidate response cache.
+
+Results are kept in an in-memory LRU and, optionally, in a SQLite database so
+that they survive restarts and are shared by all workers on the host. Entries
+younger than ttl_seconds are fresh; entries up to max_stale_seconds past that
+are still served, but flagged as stale so the caller can refresh them in the
+background. SQLite calls run in a worker thread to keep the event loop free.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+from .ttl_lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """In-memory LRU with an optional SQLite store and stale-while-revalidate reads."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        max_stale_seconds: float = 86400.0,
+        max_size: int = 512,
+        sqlite_path: Optional[str] = None,
+        namespace: str = "default"
+    ):
+        """
+        Args:
+            ttl_seconds: Age up to which an entry is served as fresh.
+            max_stale_seconds: Additional age during which an entry is still served
+                (as stale) while it is refreshed.
+            max_size: Maximum number of entries held in memory.
+            sqlite_path: Path of the SQLite database; memory only when not set.
+            namespace: Separates caches sharing one database.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.sqlite_path = sqlite_path
+        self.namespace = namespace
+        self._memory = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds + max_stale_seconds)
+        self._counts = {"disk_hits": 0, "stale_served": 0, "writes": 0, "disk_errors": 0}
+        self._schema_ready = False
+
+    async def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Return (value, is_stale), or None if there is no usable entry."""
+        entry = self._memory.get_entry(key)
+        if entry is None and self.sqlite_path:
+            entry = await self._run_sqlite(self._load, key)
+            if entry is not None:
+                self._counts["disk_hits"] += 1
+                self._memory.set(key, entry[1], stored_at=entry[0])
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.time() - stored_at
+        if age > self.ttl_seconds + self.max_stale_seconds:
+            return None
+        is_stale = age > self.ttl_seconds
+        if is_stale:
+            self._counts["stale_served"] += 1
+        return value, is_stale
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value in memory and, if configured, on disk."""
+        stored_at = time.time()
+        self._memory.set(key, value, stored_at=stored_at)
+        self._counts["writes"] += 1
+        if self.sqlite_path:
+            await self._run_sqlite(self._store, key, value, stored_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._memory.stats(), **self._counts, "persistent": bool(self.sqlite_path)}
+
+    async def _run_sqlite(self, operation, *args):
+        try:
+            return await asyncio.to_thread(operation, *args)
+        except sqlite3.Error as e:
+            self._counts["disk_errors"] += 1
+            logger.warning("Response cache store unavailable: %s", str(e))
+            return None
+        except json.JSONDecodeError as e:
+            # A corrupt row is treated as a miss and overwritten by the next set()
+            self._counts["disk_errors"] += 1
+            logger.warning("Ignoring corrupt response cache entry: %s", str(e))
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.sqlite_path, timeout=5)
+        if not self._schema_ready:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                    "PRIMARY KEY (namespace, key))"
+                )
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._schema_ready = True
+        return connection
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        # The connection's own context manager only ends the transaction; closing() closes it
+        with contextlib.closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT stored_at, value FROM responses WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _store(self, key: str, value: Any, stored_at: float) -> None:
+        with contextlib.closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), stored_at)
+            )
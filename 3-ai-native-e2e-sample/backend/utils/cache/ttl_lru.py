@@ -0,0 +1,67 @@
+"""
+Bounded LRU cache with per-entry time-to-live.
+
+Entries are evicted least-recently-used first once the cache is full, and
+treated as missing once they are older than the TTL. Hit, miss, eviction and
+expiration counts are kept so that cache parameters can be tuned.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """LRU cache whose entries expire after ttl_seconds."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self.get_entry(key)
+        return entry[1] if entry else None
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        """Return (stored_at, value) for a key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counts["misses"] += 1
+            return None
+        if self.is_expired(entry[0]):
+            del self._entries[key]
+            self._counts["expirations"] += 1
+            self._counts["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counts["hits"] += 1
+        return entry
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry if full.
+
+        Args:
+            stored_at: Original storage time (epoch seconds) when restoring an
+                entry from another store; defaults to now.
+        """
+        self._entries[key] = (stored_at if stored_at is not None else time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counts["evictions"] += 1
+
+    def is_expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counts["hits"] + self._counts["misses"]
+        return {
+            "size": len(self._entries),
+            **self._counts,
+            "hit_ratio": round(self._counts["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
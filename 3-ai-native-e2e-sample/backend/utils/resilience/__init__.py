@@ -0,0 +1,9 @@
+"""Retries, backoff and circuit breakers for calls to upstream services."""
+
+from .breaker import CircuitBreaker, CircuitOpenError, breaker_stats, get_breaker
+from .retry import RetryPolicy, call_with_retry, is_rejected_request, is_transient
+
+__all__ = [
+    'CircuitBreaker', 'CircuitOpenError', 'RetryPolicy',
+    'breaker_stats', 'call_with_retry', 'get_breaker', 'is_rejected_request', 'is_transient'
+]
@@ -0,0 +1,89 @@
+"""
+Circuit breakers for upstream dependencies.
+
+After failure_threshold consecutive transient failures a breaker opens and
+calls fail immediately with CircuitOpenError instead of waiting on a degraded
+upstream. Once reset_seconds have passed a single trial call is let through
+(half-open); its success closes the breaker, its failure opens it again.
+"""
+
+import os
+import time
+from typing import Any, Dict
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open), retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one dependency."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+        self._counts = {"opened": 0, "rejected": 0}
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may proceed now."""
+        if self.state == self.CLOSED:
+            return
+        elapsed = time.monotonic() - self._opened_at
+        if self.state == self.OPEN and elapsed >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return
+        self._counts["rejected"] += 1
+        raise CircuitOpenError(self.name, max(self.reset_seconds - elapsed, 0.0))
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_progress = False
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_progress = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self._counts["opened"] += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed transiently."""
+        self._trial_in_progress = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counts, "state": self.state, "consecutive_failures": self._failures}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a dependency, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_seconds=float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+        )
+        _breakers[name] = breaker
+    return breaker
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Return the state of every breaker, keyed by dependency name."""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
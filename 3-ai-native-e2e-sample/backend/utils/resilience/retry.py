@@ -0,0 +1,144 @@
+"""
+Classified retries with jittered exponential backoff and deadlines.
+
+Only transient failures (timeouts, connection errors, throttling and server
+errors) are retried; anything else is raised immediately. Delays use "full
+jitter" so that many clients recovering at once do not retry in lockstep, and
+a Retry-After sent by the service is honored. An overall deadline bounds the
+total time spent, including the attempts themselves.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+from .breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying: timeout, throttling and server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error from an Azure SDK call is likely to succeed on retry."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, ServiceRequestError, ServiceResponseError)):
+        return True
+    if isinstance(error, HttpResponseError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+def is_rejected_request(error: BaseException) -> bool:
+    """Whether a call certainly had no effect: the request was never sent, or it was
+    throttled or refused as unavailable. Only these failures are safe to retry for
+    operations that are not idempotent (e.g. creating a run); a timeout or a
+    dropped response may come after the service has already acted.
+    """
+    if isinstance(error, ServiceRequestError):
+        return True
+    if isinstance(error, HttpResponseError):
+        return error.status_code in (429, 503)
+    return False
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After") or headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """How often and how long to retry a transiently failing call."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline: Optional[float] = None,
+        retry_on: Callable[[BaseException], bool] = is_transient
+    ):
+        """
+        Args:
+            max_attempts: Total attempts, including the first.
+            base_delay: Backoff ceiling for the first retry, doubled per retry.
+            max_delay: Upper bound for any single backoff.
+            deadline: Seconds after which no further attempt is made (None = no deadline).
+            retry_on: Classifies an error as transient (retry) or permanent (raise).
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = retry_on
+
+    @classmethod
+    def from_env(cls, **overrides) -> "RetryPolicy":
+        """Create a policy from RETRY_MAX_ATTEMPTS / RETRY_BASE_DELAY_SECONDS / RETRY_MAX_DELAY_SECONDS."""
+        settings = {
+            "max_attempts": int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+            "base_delay": float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5")),
+            "max_delay": float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8")),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before the given retry (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+async def call_with_retry(
+    operation: Callable[[], Awaitable[T]],
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    name: str = "call"
+) -> T:
+    """Call operation, retrying transient failures per policy behind an optional breaker.
+
+    Raises:
+        CircuitOpenError: The breaker is open; the operation was not called.
+        The operation's last error once it is permanent, attempts are exhausted
+        or the deadline has passed.
+    """
+    policy = policy or RetryPolicy.from_env()
+    deadline = time.monotonic() + policy.deadline if policy.deadline is not None else None
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker:
+            breaker.before_call()
+        try:
+            if deadline is not None:
+                result = await asyncio.wait_for(operation(), timeout=max(deadline - time.monotonic(), 0))
+            else:
+                result = await operation()
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release()
+            raise
+        except Exception as e:
+            retryable = policy.retry_on(e)
+            if breaker:
+                # Transient failures count against the breaker even when the policy
+                # does not retry them (e.g. timeouts of non-idempotent calls)
+                if retryable or is_transient(e):
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+            if not retryable or attempt >= policy.max_attempts:
+                raise
+            delay = _retry_after(e) or policy.backoff(attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            logger.warning("%s failed (attempt %d/%d), retrying in %.2fs: %s",
+                           name, attempt, policy.max_attempts, delay, str(e))
+            await asyncio.sleep(delay)
+            continue
+        if breaker:
+            breaker.record_success()
+        return result
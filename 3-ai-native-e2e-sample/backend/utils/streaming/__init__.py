@@ -0,0 +1,8 @@
+"""Helpers shared by the server-sent event (SSE) streaming routers."""
+
+from .disconnect import DisconnectWatcher
+from .json_fields import JSONFieldStream
+from .singleflight import SingleFlight
+from .sse import encode_event, encode_stream
+
+__all__ = ['DisconnectWatcher', 'JSONFieldStream', 'SingleFlight', 'encode_event', 'encode_stream']
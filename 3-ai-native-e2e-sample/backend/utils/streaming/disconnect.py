@@ -0,0 +1,28 @@
+"""
+Client disconnect detection for SSE streams.
+
+Checking Request.is_disconnected on every token would add an ASGI receive
+per event, so the watcher only polls the connection state at a fixed interval.
+"""
+
+import time
+from fastapi import Request
+
+class DisconnectWatcher:
+    """Rate-limited wrapper around Request.is_disconnected."""
+
+    def __init__(self, request: Request, interval: float = 0.5):
+        self.request = request
+        self.interval = interval
+        self.disconnected = False
+        self._checked_at = 0.0
+
+    async def is_disconnected(self) -> bool:
+        """Return True once the client has gone away."""
+        if self.disconnected:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at >= self.interval:
+            self._checked_at = now
+            self.disconnected = await self.request.is_disconnected()
+        return self.disconnected
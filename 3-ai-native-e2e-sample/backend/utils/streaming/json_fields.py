@@ -0,0 +1,80 @@
+"""
+Incremental extraction of top-level fields from a streamed JSON object.
+
+Model output arrives as text deltas. JSONFieldStream scans each character once,
+tracking string and nesting state, and returns every top-level field of the
+object as soon as its value is complete, so that e.g. an 'analysis' field can be
+shown while the remaining fields are still being generated. Text before the
+opening brace (such as a ```json fence) is ignored.
+"""
+
+import json
+import logging
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class JSONFieldStream:
+    """Feeds text deltas and yields (field, value) pairs of completed top-level fields."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self.fields = {}
+        self.complete = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add a delta and return the fields completed by it."""
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self.complete:
+            char = buffer[self._pos]
+            if self._depth == 0 and char != "{":
+                # Preamble before the object, e.g. a ```json fence
+                pass
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(buffer[self._key_start:self._pos + 1])
+                        self._key_start = None
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = self._pos
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_field(buffer, completed)
+                    self.complete = True
+            elif self._depth == 1:
+                if char == ":" and self._key is not None:
+                    self._value_start = self._pos + 1
+                elif char == ",":
+                    self._complete_field(buffer, completed)
+            self._pos += 1
+        return completed
+
+    def _complete_field(self, buffer: str, completed: List[Tuple[str, Any]]) -> None:
+        if self._key is not None and self._value_start is not None:
+            try:
+                value = json.loads(buffer[self._value_start:self._pos])
+                self.fields[self._key] = value
+                completed.append((self._key, value))
+            except json.JSONDecodeError as e:
+                logger.debug("Skipping malformed field %s: %s", self._key, str(e))
+        self._key = None
+        self._value_start = None
@@ -0,0 +1,257 @@
+"""
+Single-flight de-duplication of streamed agent requests.
+
+Concurrent requests with the same key attach to one in-flight producer instead
+of each starting their own agent run. Every subscriber receives the full event
+sequence: events produced before it joined are replayed from the flight's
+history, later ones as they arrive. The producer is cancelled only when its
+last subscriber has gone away.
+
+Memory is bounded on both sides. Each subscriber has a buffer of at most
+max_lag events; when a subscriber's buffer is full the producer waits for it
+(backpressure), and a subscriber that stays full for lag_timeout seconds is
+dropped so one stalled client cannot hold up the others forever; its stream
+ends with an error event. The replay
+history holds at most max_history events; a flight that outgrows it stops
+accepting new subscribers, and later requests start a flight of their own.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Hashable, List, Optional
+from .disconnect import DisconnectWatcher
+
+logger = logging.getLogger(__name__)
+
+# Last event sent to a subscriber that was dropped for lagging, so its client
+# reports a failure instead of a stream that ended without a final response
+DROPPED_EVENT = {'type': 'error', 'content': 'Stream fell too far behind and was closed; please retry.'}
+
+class _Subscriber:
+    """Bounded event buffer of one subscriber."""
+
+    def __init__(self, backlog: List[Any]):
+        self.buffer: Deque[Any] = deque(backlog)
+        self.dropped = False
+        self.readable = asyncio.Event()
+        self.writable = asyncio.Event()
+
+class _Flight:
+    """State of one in-flight producer shared by its subscribers."""
+
+    def __init__(self):
+        # None once the history outgrew max_history (the flight no longer accepts joiners)
+        self.history: Optional[List[Any]] = []
+        self.done = False
+        self.subscribers: List[_Subscriber] = []
+        self.task: Optional[asyncio.Task] = None
+
+    def wake_all(self) -> None:
+        for subscriber in self.subscribers:
+            subscriber.readable.set()
+
+class _Subscription:
+    """Async iterator over one subscriber's events; aclose() unsubscribes even if it was never iterated."""
+
+    def __init__(self, flights: "SingleFlight", flight: _Flight, subscriber: _Subscriber, watcher: Optional[DisconnectWatcher]):
+        self._flights = flights
+        self._flight = flight
+        self._subscriber = subscriber
+        self._events = flights._read(flight, subscriber, watcher)
+
+    def __aiter__(self) -> "_Subscription":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self._events.__anext__()
+
+    async def aclose(self) -> None:
+        await self._events.aclose()
+        self._flights._leave(self._flight, self._subscriber)
+
+class SingleFlight:
+    """Shares one producer between concurrent subscribers with the same key."""
+
+    def __init__(
+        self,
+        name: str = "flight",
+        max_history: int = 1024,
+        max_lag: int = 64,
+        lag_timeout: float = 10.0
+    ):
+        """
+        Args:
+            name: Used in logs.
+            max_history: Events kept for replay to subscribers joining late.
+            max_lag: Events buffered per subscriber before the producer waits for it.
+            lag_timeout: Time a subscriber may keep the producer waiting before it is dropped.
+        """
+        self.name = name
+        self.max_history = max_history
+        self.max_lag = max_lag
+        self.lag_timeout = lag_timeout
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._counts = {"started": 0, "joined": 0, "cancelled": 0, "dropped": 0, "detached": 0}
+
+    @classmethod
+    def from_env(cls, name: str) -> "SingleFlight":
+        """Create a SingleFlight bounded by STREAM_MAX_HISTORY / STREAM_SUBSCRIBER_MAX_LAG /
+        STREAM_SUBSCRIBER_LAG_TIMEOUT_SECONDS."""
+        return cls(
+            name,
+            max_history=int(os.getenv("STREAM_MAX_HISTORY", "1024")),
+            max_lag=int(os.getenv("STREAM_SUBSCRIBER_MAX_LAG", "64")),
+            lag_timeout=float(os.getenv("STREAM_SUBSCRIBER_LAG_TIMEOUT_SECONDS", "10"))
+        )
+
+    def stream(
+        self,
+        key: Hashable,
+        producer: Callable[[], AsyncIterator[Any]],
+        watcher: Optional[DisconnectWatcher] = None,
+        slot: Optional[Any] = None
+    ) -> "_Subscription":
+        """Subscribe to the flight for key, starting it with producer if needed.
+
+        The subscription is registered immediately, so a flight that exists when
+        this is called cannot end before it is joined.
+
+        Args:
+            key: Identifies identical requests (endpoint and normalized input).
+            producer: Called once per flight to create the shared event iterator.
+                It should not watch any single client; that is done per subscriber.
+            watcher: Ends this subscription when its client disconnects.
+            slot: Admission slot (anything with release()). If this call starts the
+                flight, the slot is held until its producer finishes, however many
+                subscribers come and go; if it joins one, the slot is released at once.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, producer))
+            # Runs even if the task is cancelled before it starts
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            if slot is not None:
+                flight.task.add_done_callback(lambda _: slot.release())
+            self._counts["started"] += 1
+        else:
+            self._counts["joined"] += 1
+            if slot is not None:
+                slot.release()
+        subscriber = _Subscriber(flight.history or [])
+        flight.subscribers.append(subscriber)
+        return _Subscription(self, flight, subscriber, watcher)
+
+    async def _read(self, flight: _Flight, subscriber: _Subscriber, watcher: Optional[DisconnectWatcher]) -> AsyncIterator[Any]:
+        try:
+            while True:
+                if subscriber.buffer:
+                    event = subscriber.buffer.popleft()
+                    subscriber.writable.set()
+                    yield event
+                    continue
+                # Checked before done: a dropped subscriber has missed events even if the flight completed
+                if subscriber.dropped:
+                    logger.warning("⚠️ %s subscriber fell too far behind and was dropped", self.name)
+                    yield DROPPED_EVENT
+                    return
+                if flight.done:
+                    return
+                if watcher and await watcher.is_disconnected():
+                    return
+                subscriber.readable.clear()
+                if subscriber.buffer or flight.done or subscriber.dropped:
+                    continue
+                try:
+                    await asyncio.wait_for(subscriber.readable.wait(), timeout=watcher.interval if watcher else None)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._leave(flight, subscriber)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a flight for key is in progress (a new request would join it)."""
+        return key in self._flights
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counts, "in_flight": len(self._flights)}
+
+    def _leave(self, flight: _Flight, subscriber: _Subscriber) -> None:
+        # Unblock the producer if it is waiting for this subscriber
+        subscriber.writable.set()
+        if subscriber not in flight.subscribers:
+            # Already left, or dropped by the producer (which stops itself once nobody is left)
+            return
+        flight.subscribers.remove(subscriber)
+        if not flight.subscribers and not flight.done:
+            # Nobody is listening any more; stop the producer (and its run)
+            self._counts["cancelled"] += 1
+            flight.task.cancel()
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        flight.done = True
+        flight.wake_all()
+        self._detach(key, flight)
+
+    def _detach(self, key: Hashable, flight: _Flight) -> None:
+        """Stop offering a flight to new subscribers."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _deliver(self, flight: _Flight, subscriber: _Subscriber, event: Any) -> None:
+        """Append an event to a subscriber's buffer, waiting while it is full."""
+        while len(subscriber.buffer) >= self.max_lag and subscriber in flight.subscribers:
+            subscriber.writable.clear()
+            try:
+                await asyncio.wait_for(subscriber.writable.wait(), timeout=self.lag_timeout)
+            except asyncio.TimeoutError:
+                self._counts["dropped"] += 1
+                subscriber.dropped = True
+                flight.subscribers.remove(subscriber)
+                subscriber.readable.set()
+                return
+        if subscriber in flight.subscribers:
+            subscriber.buffer.append(event)
+            subscriber.readable.set()
+
+    async def _produce(self, key: Hashable, flight: _Flight, producer: Callable[[], AsyncIterator[Any]]) -> None:
+        events = None
+        try:
+            events = producer()
+            async for event in events:
+                if flight.history is not None:
+                    flight.history.append(event)
+                    if len(flight.history) > self.max_history:
+                        # Late joiners could no longer get the full sequence
+                        flight.history = None
+                        self._detach(key, flight)
+                        self._counts["detached"] += 1
+                # Subscribers with room get the event at once; the producer only
+                # waits (concurrently) for those whose buffer is full
+                blocked = []
+                for subscriber in flight.subscribers:
+                    if len(subscriber.buffer) < self.max_lag:
+                        subscriber.buffer.append(event)
+                        subscriber.readable.set()
+                    else:
+                        blocked.append(subscriber)
+                if blocked:
+                    await asyncio.gather(*(self._deliver(flight, subscriber, event) for subscriber in blocked))
+                if not flight.subscribers:
+                    # Every subscriber left or was dropped; stop the producer (and its run)
+                    self._counts["cancelled"] += 1
+                    break
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("❌ %s flight failed: %s", self.name, str(e))
+        finally:
+            aclose = getattr(events, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception as e:
+                    logger.debug("Error closing %s producer: %s", self.name, str(e))
@@ -0,0 +1,102 @@
+"""
+Server-sent event (SSE) frame encoding.
+
+Routers produce structured event dicts ({'type': ..., 'content': ...}) and
+encode them once, here, at the edge of the response. Consecutive 'delta'
+events are coalesced into a single frame within a short time or byte window,
+so token-heavy answers need far fewer frames and writes, and idle streams get
+periodic comment frames that keep proxies from closing the connection.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional
+
+# Deltas are held for at most SSE_COALESCE_MS (0 disables coalescing) or until
+# SSE_COALESCE_BYTES of text are buffered
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", "50"))
+SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "1024"))
+# Idle time after which a heartbeat comment is sent (0 disables heartbeats)
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+HEARTBEAT_FRAME = ": keep-alive\n\n"
+
+def encode_event(event: Dict[str, Any]) -> str:
+    """Encode one event as an SSE data frame."""
+    return f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+def _is_delta(event: Dict[str, Any]) -> bool:
+    return event.get("type") == "delta" and isinstance(event.get("content"), str)
+
+async def encode_stream(
+    events: AsyncIterable[Dict[str, Any]],
+    coalesce_ms: float = SSE_COALESCE_MS,
+    coalesce_bytes: int = SSE_COALESCE_BYTES,
+    heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """Encode an event stream as SSE frames, coalescing deltas and sending heartbeats.
+
+    Closing the returned generator closes the event stream as well.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    buffered: Optional[Dict[str, Any]] = None
+    buffered_bytes = 0
+    flush_at = 0.0
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            if buffered is not None:
+                timeout = max(flush_at - loop.time(), 0)
+            else:
+                timeout = heartbeat_seconds if heartbeat_seconds > 0 else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                if buffered is not None:
+                    yield encode_event(buffered)
+                    buffered = None
+                else:
+                    yield HEARTBEAT_FRAME
+                continue
+
+            completed, pending = pending, None
+            try:
+                event = completed.result()
+            except StopAsyncIteration:
+                break
+
+            if coalesce_ms > 0 and _is_delta(event):
+                if buffered is None:
+                    buffered = dict(event)
+                    buffered_bytes = len(event["content"])
+                    flush_at = loop.time() + coalesce_ms / 1000.0
+                else:
+                    buffered["content"] += event["content"]
+                    buffered_bytes += len(event["content"])
+                if buffered_bytes >= coalesce_bytes:
+                    yield encode_event(buffered)
+                    buffered = None
+                continue
+
+            frame = encode_event(event)
+            if buffered is not None:
+                # Write the held text and the new event together
+                frame = encode_event(buffered) + frame
+                buffered = None
+            yield frame
+
+        if buffered is not None:
+            yield encode_event(buffered)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration, Exception):
+                pass
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
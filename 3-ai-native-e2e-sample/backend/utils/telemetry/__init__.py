@@ -3,8 +3,9 @@
 from opentelemetry import trace
 from opentelemetry.trace import Status, StatusCode
 from .configurator import configure_telemetry
+from .latency import LatencyRecorder, latency_recorder
 
 # Initialize tracer
 tracer = trace.get_tracer(__name__)
 
-__all__ = ['tracer', 'Status', 'StatusCode', 'configure_telemetry']
+__all__ = ['tracer', 'Status', 'StatusCode', 'configure_telemetry', 'LatencyRecorder', 'latency_recorder']
@@ -0,0 +1,42 @@
+"""
+Latency recording for Clinical Trials Monitor.
+
+Keeps a bounded window of recent samples per metric so that percentiles
+(p50/p95) can be reported from the /metrics endpoint without an external
+metrics backend. Samples are also suitable for attaching to spans.
+"""
+
+from collections import deque
+from typing import Deque, Dict
+
+class LatencyRecorder:
+    """Bounded per-metric latency windows with percentile summaries."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a latency sample in seconds."""
+        self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count, p50, p95 and max (in milliseconds) for every metric."""
+        result = {}
+        for name, samples in self._samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            result[name] = {
+                "count": len(ordered),
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+            }
+        return result
+
+def _percentile(ordered: list, fraction: float) -> float:
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+latency_recorder = LatencyRecorder()